@@ -1,15 +1,34 @@
+import sys
+
+import numpy as np
 import pygame
-from queue import PriorityQueue
 
-# --- INITIALIZE FONTS ---
-pygame.init()
-pygame.font.init()
-# We use a standard font, size 15 to fit inside the squares
-FONT = pygame.font.SysFont('arial', 15, bold=True)
+from grid_engine import ArrayGrid
+from grid_view import CLOSED, EMPTY, END, OPEN, PATH, START, STOP, WALL, Viewport, handle_view_event
+from incremental import DStarLite
+from instrumentation import SearchProbe
+from multi_stop import plan_multi_stop
+from route_planner import A_star_algorithm as plan_leg, cell_changed
+
+# Visual mode only. The planning logic lives in route_planner.py; nothing is
+# initialised until init_display() runs, so importing this file is cheap.
 
 WIDTH = 600
-WIN = pygame.display.set_mode((WIDTH, WIDTH))
-pygame.display.set_caption("RESCUE 1122: ROUTE BUILDER")
+FONT = None
+# [S] writes the drawn map here in the binary format (see grid_engine.py)
+EXPORT_PATH = "rescue_map.rmap"
+
+# --- INITIALIZE DISPLAY & FONTS ---
+def init_display(width):
+    global FONT
+    pygame.init()
+    pygame.font.init()
+    # We use a standard font, size 15 to fit inside the squares
+    FONT = pygame.font.SysFont('arial', 15, bold=True)
+
+    win = pygame.display.set_mode((width, width))
+    pygame.display.set_caption("RESCUE 1122: ROUTE BUILDER")
+    return win
 
 # --- COLOR DEFINITIONS ---
 RED = (255, 0, 0)       # Closed nodes
@@ -21,6 +40,21 @@ ORANGE = (255, 165, 0)  # Start
 GREY = (128, 128, 128)  # Grid Lines
 TURQUOISE = (64, 224, 208) # End
 PURPLE = (200, 160, 255)   # Numbered Nodes (Light Purple background for visibility)
+KEY = (255, 0, 255)        # Transparent colour of the grid-line overlay
+
+# --- RENDER STATE ---
+# Every Node whose colour or text changes lands in DIRTY so the renderer only
+# repaints those cells; rendered labels are cached by their text.
+DIRTY = set()
+LABELS = {}
+
+def label_surface(text):
+    surf = LABELS.get(text)
+    if surf is None:
+        # Render text in Black (or White if background is dark)
+        surf = FONT.render(text, True, (0, 0, 0))
+        LABELS[text] = surf
+    return surf
 
 class Node:
     def __init__(self, row, col, width, total_rows):
@@ -28,13 +62,33 @@ class Node:
         self.col = col
         self.x = row * width
         self.y = col * width
-        self.color = WHITE
-        self.neighbors = []
+        self._color = WHITE
         self.width = width
         self.total_rows = total_rows
         
         # [NEW] Attribute to hold the text ("S", "E", "1", etc.)
-        self.text = "" 
+        self._text = "" 
+
+    # colour and text changes mark the node for the next repaint
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, value):
+        if value != self._color:
+            self._color = value
+            DIRTY.add(self)
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        if value != self._text:
+            self._text = value
+            DIRTY.add(self)
 
     def get_pos(self):
         return self.row, self.col
@@ -78,90 +132,74 @@ class Node:
 
     def draw(self, win):
         # 1. Draw the colored square
-        pygame.draw.rect(win, self.color, (self.x, self.y, self.width, self.width))
+        rect = pygame.draw.rect(win, self.color, (self.x, self.y, self.width, self.width))
         
         # 2. Draw the text (if any) centered in the square
         if self.text != "":
-            # Render text in Black (or White if background is dark)
-            text_color = (0, 0, 0)
-            text_surf = FONT.render(self.text, True, text_color)
+            text_surf = label_surface(self.text)
             
             # Math to center the text
             text_rect = text_surf.get_rect(center=(self.x + self.width/2, self.y + self.width/2))
             win.blit(text_surf, text_rect)
-
-    def update_neighbors(self, grid):
-        self.neighbors = []
-        if self.row < self.total_rows - 1 and not grid[self.row + 1][self.col].is_barrier():
-            self.neighbors.append(grid[self.row + 1][self.col])
-        if self.row > 0 and not grid[self.row - 1][self.col].is_barrier():
-            self.neighbors.append(grid[self.row - 1][self.col])
-        if self.col < self.total_rows - 1 and not grid[self.row][self.col + 1].is_barrier():
-            self.neighbors.append(grid[self.row][self.col + 1])
-        if self.col > 0 and not grid[self.row][self.col - 1].is_barrier():
-            self.neighbors.append(grid[self.row][self.col - 1])
+        return rect
 
     def __lt__(self, other):
         return False
 
-def heuristic(p1, p2):
-    x1, y1 = p1
-    x2, y2 = p2
-    return abs(x1 - x2) + abs(y1 - y2)
-
-def reconstruct_path(came_from, current, draw):
-    while current in came_from:
-        current = came_from[current]
+def reconstruct_path(path, draw):
+    for current in path:
         # Don't overwrite the Start/End/Numbers colors with Yellow, 
         # just let the line flow through (or overwrite if you prefer standard look)
         if current.text == "": 
             current.make_path()
         draw()
 
-def A_star_algorithm(draw, grid, start, end):
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((0, count, start))
-    came_from = {}
-    
-    g_score = {spot: float("inf") for row in grid for spot in row}
-    g_score[start] = 0
-    f_score = {spot: float("inf") for row in grid for spot in row}
-    f_score[start] = heuristic(start.get_pos(), end.get_pos())
-
-    open_set_hash = {start}
+def A_star_algorithm(draw, grid, cells, start, end, probe=None):
+    # The search runs headless on the ArrayGrid `cells` (see route_planner);
+    # `grid` is only used to look up the Node to colour. The colouring hangs
+    # off a SearchProbe, whose counters can be read once the leg is done.
+    def on_expand(idx):
+        # events are only pumped when the renderer actually shows a frame
+        if draw():
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+        row, col = cells.pos(idx)
+        node = grid[row][col]
+        if node != start:
+            node.make_closed()
+
+    def on_push(idx):
+        row, col = cells.pos(idx)
+        grid[row][col].make_open()
+
+    if probe is None:
+        probe = SearchProbe()
+    probe.on_expand = on_expand
+    probe.on_push = on_push
+    path = plan_leg(cells, start.get_pos(), end.get_pos(), probe=probe)
+    if path:
+        reconstruct_path([grid[row][col] for row, col in path[-2::-1]], draw)
+    return bool(path)
+
+def repair_route(grid, cells, planners, idx):
+    # A wall was drawn or erased at cell idx after the route was planned.
+    # Each leg's D* Lite planner only re-evaluates idx and its neighbours and
+    # repairs the affected part of its search, then the route is redrawn.
+    for planner in planners:
+        planner.cell_changed(idx)
 
-    while not open_set.empty():
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        current = open_set.get()[2]
-        open_set_hash.remove(current)
-
-        if current == end:
-            reconstruct_path(came_from, end, draw)
-            return True
-
-        for neighbor in current.neighbors:
-            temp_g_score = g_score[current] + 1
-
-            if temp_g_score < g_score[neighbor]:
-                came_from[neighbor] = current
-                g_score[neighbor] = temp_g_score
-                f_score[neighbor] = temp_g_score + heuristic(neighbor.get_pos(), end.get_pos())
-                if neighbor not in open_set_hash:
-                    count += 1
-                    open_set.put((f_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-                    neighbor.make_open() 
-
-        draw()
-
-        if current != start:
-            current.make_closed() 
+    for row in grid:
+        for node in row:
+            if node.text == "" and node.color in (YELLOW, RED, GREEN):
+                node.reset()
 
-    return False
+    for planner in planners:
+        planner.replan()
+        for cell in planner.path()[1:-1]:
+            row, col = cells.pos(cell)
+            if grid[row][col].text == "":
+                grid[row][col].make_path()
 
 def make_grid(rows, width):
     grid = []
@@ -177,16 +215,65 @@ def draw_grid(win, rows, width):
     gap = width // rows
     for i in range(rows):
         pygame.draw.line(win, GREY, (0, i * gap), (width, i * gap))
-        for j in range(rows):
-            pygame.draw.line(win, GREY, (j * gap, 0), (j * gap, width))
-
-def draw(win, grid, rows, width):
-    win.fill(WHITE)
-    for row in grid:
-        for node in row:
-            node.draw(win)
-    draw_grid(win, rows, width)
-    pygame.display.update()
+        pygame.draw.line(win, GREY, (i * gap, 0), (i * gap, width))
+
+# --- RENDERER ---
+# Repaints only the cells in DIRTY and blits the matching piece of a cached
+# grid-line overlay over each one. Frames are presented at most `fps` times
+# a second; with `steps_per_frame` set, every that many draw() calls instead
+# (paced to `fps`), which keeps the search animation watchable.
+class GridRenderer:
+    def __init__(self, win, grid, rows, width, fps=60, steps_per_frame=None):
+        self.win = win
+        self.fps = fps
+        self.steps_per_frame = steps_per_frame
+        self.clock = pygame.time.Clock()
+        self.last_frame = None
+        self.steps = 0
+
+        self.lines = pygame.Surface((width, width))
+        self.lines.fill(KEY)
+        self.lines.set_colorkey(KEY)
+        draw_grid(self.lines, rows, width)
+
+        self.reset(grid)
+
+    def reset(self, grid):
+        # new board: repaint everything on the next frame
+        self.grid = grid
+        self.full = True
+        DIRTY.clear()
+
+    def draw(self):
+        # returns True when a frame was presented
+        self.steps += 1
+        now = pygame.time.get_ticks()
+        if self.steps_per_frame is not None:
+            if self.steps < self.steps_per_frame:
+                return False
+            self.clock.tick(self.fps)
+        elif self.last_frame is not None and now - self.last_frame < 1000 / self.fps:
+            return False
+        self.steps = 0
+        self.last_frame = now
+
+        if self.full:
+            self.win.fill(WHITE)
+            for row in self.grid:
+                for node in row:
+                    node.draw(self.win)
+            self.win.blit(self.lines, (0, 0))
+            pygame.display.update()
+            self.full = False
+        elif DIRTY:
+            rects = []
+            for node in DIRTY:
+                rect = node.draw(self.win)
+                self.win.blit(self.lines, rect.topleft, rect)
+                rects.append(rect)
+            pygame.display.update(rects)
+        DIRTY.clear()
+        return True
 
 def get_clicked_pos(pos, rows, width):
     gap = width // rows
@@ -195,18 +282,163 @@ def get_clicked_pos(pos, rows, width):
     col = y // gap
     return row, col
 
-def main(win, width):
-    ROWS = 30
+# --- LARGE-GRID MODE ---
+# Maps with more than LARGE_GRID rows are drawn through a zoomable viewport
+# (grid_view.py) instead of one Node per cell, from a uint8 array of cell
+# states. Besides the viewport's zoom / pan keys, [ and ] change the size of
+# the wall brush.
+LARGE_GRID = 100
+
+def line_cells(a, b):
+    # cells on the segment a -> b, so a fast mouse stroke leaves no gaps
+    steps = max(abs(b[0] - a[0]), abs(b[1] - a[1]), 1)
+    rows = np.rint(np.linspace(a[0], b[0], steps + 1)).astype(int)
+    cols = np.rint(np.linspace(a[1], b[1], steps + 1)).astype(int)
+    return list(dict.fromkeys(zip(rows.tolist(), cols.tolist())))
+
+def main_large(win, cells, stops=()):
+    rows, cols = cells.rows, cells.cols
+    state = np.where(cells.as_2d() != 0, WALL, EMPTY).astype(np.uint8)
+    marks = memoryview(state.reshape(-1))
+    view = Viewport(win, rows, cols)
+    clock = pygame.time.Clock()
+
+    stops = list(stops)
+    mode = 'placing_walls' if len(stops) > 1 else 'placing_stops'
+    brush = 0
+    last = None
+
+    def mark_stops():
+        for i, (row, col) in enumerate(stops):
+            end = mode == 'placing_walls' and i == len(stops) - 1
+            state[row, col] = START if i == 0 else END if end else STOP
+
+    def paint(a, b, blocked):
+        for row, col in line_cells(a, b):
+            for r in range(max(row - brush, 0), min(row + brush + 1, rows)):
+                for c in range(max(col - brush, 0), min(col + brush + 1, cols)):
+                    idx = cells.index(r, c)
+                    if (r, c) in stops or cells.is_barrier(idx) == blocked:
+                        continue
+                    cells.set_barrier(idx, blocked)
+                    cell_changed(cells, idx)
+                    marks[idx] = WALL if blocked else EMPTY
+
+    def run_route():
+        nonlocal stops
+        overlay = (state == OPEN) | (state == CLOSED) | (state == PATH)
+        state[overlay] = EMPTY
+        if len(stops) > 2:
+            order, _, _ = plan_multi_stop(cells, stops, processes=1)
+            stops = [stops[i] for i in order]
+        mark_stops()
+        steps = [0]
+
+        def on_expand(idx):
+            if marks[idx] == OPEN:
+                marks[idx] = CLOSED
+            steps[0] += 1
+            if steps[0] % 4096 == 0:
+                view.draw(state)
+                pygame.event.pump()
+
+        def on_push(idx):
+            if marks[idx] == EMPTY:
+                marks[idx] = OPEN
+
+        expanded = 0
+        for a, b in zip(stops, stops[1:]):
+            probe = SearchProbe(on_expand=on_expand, on_push=on_push)
+            path = plan_leg(cells, a, b, probe=probe)
+            expanded += probe.expansions
+            for row, col in path[1:-1]:
+                state[row, col] = PATH
+        mark_stops()
+        pygame.display.set_caption(f"Route planned: {expanded} cells expanded")
+
+    mark_stops()
+    pygame.display.set_caption(f"{rows}x{cols} map - wheel: zoom, middle drag / arrows: pan, [ ]: brush")
+    run = True
+    while run:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                run = False
+            elif handle_view_event(view, event):
+                pass
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and mode == 'placing_stops':
+                cell = view.cell_at(event.pos)
+                if cell not in stops and not cells.is_barrier(cells.index(*cell)):
+                    stops.append(cell)
+                    mark_stops()
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_LEFTBRACKET:
+                    brush = max(brush - 1, 0)
+                elif event.key == pygame.K_RIGHTBRACKET:
+                    brush += 1
+                elif event.key == pygame.K_b and mode == 'placing_stops' and len(stops) > 1:
+                    mode = 'placing_walls'
+                    mark_stops()
+                    pygame.display.set_caption("MODE: WALLS (Draw obstacles) - Press SPACE to Run")
+                elif event.key == pygame.K_SPACE and len(stops) > 1:
+                    run_route()
+                elif event.key == pygame.K_s:
+                    cells.save_binary(EXPORT_PATH)
+                    pygame.display.set_caption(f"Saved map to {EXPORT_PATH}")
+                elif event.key == pygame.K_c:
+                    stops = []
+                    mode = 'placing_stops'
+                    state[state != WALL] = EMPTY
+
+        # left button paints walls, right button erases them
+        buttons = pygame.mouse.get_pressed()
+        if mode == 'placing_walls' and (buttons[0] or buttons[2]):
+            cell = view.cell_at(pygame.mouse.get_pos())
+            paint(last or cell, cell, bool(buttons[0]))
+            last = cell
+        else:
+            last = None
+
+        view.draw(state)
+        clock.tick(60)
+
+    pygame.quit()
+
+def main(win, width, cells=None, stops=()):
+    if cells is not None and (cells.rows > LARGE_GRID or cells.cols != cells.rows):
+        return main_large(win, cells, stops)
+    ROWS = 30 if cells is None else cells.rows
     grid = make_grid(ROWS, width)
-    
-    stops = [] 
+    renderer = GridRenderer(win, grid, ROWS, width)
+
+    # Occupancy array kept in step with the walls as they are drawn, and one
+    # incremental planner per leg once a route has been run
+    if cells is None:
+        cells = ArrayGrid(ROWS)
+    planners = []
+
+    # Optional preloaded map (ArrayGrid) and (row, col) stops from the CLI
+    for idx in cells.cells.nonzero()[0]:
+        row, col = cells.pos(int(idx))
+        grid[row][col].make_barrier()
+    stops = [grid[row][col] for row, col in stops]
+    for i, node in enumerate(stops):
+        if i == 0:
+            node.make_start()
+        else:
+            node.make_numbered(i)
     
     # Modes: 'placing_stops' or 'placing_walls'
     mode = 'placing_stops'
+    if len(stops) > 1:
+        mode = 'placing_walls'
+        stops[-1].make_end()
+        pygame.display.set_caption("MODE: WALLS (Draw obstacles) - Press SPACE to Run")
     
+    # draw() skips throttled frames without waiting, so the loop sleeps here
+    clock = pygame.time.Clock()
     run = True
     while run:
-        draw(win, grid, ROWS, width)
+        renderer.draw()
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -233,17 +465,30 @@ def main(win, width):
 
                 # MODE 2: PLACING WALLS (After B is pressed)
                 elif mode == 'placing_walls':
-                    if node not in stops:
+                    if node not in stops and not node.is_barrier():
                         node.make_barrier()
+                        idx = cells.index(row, col)
+                        cells.set_barrier(idx)
+                        cell_changed(cells, idx)
+                        if planners:
+                            repair_route(grid, cells, planners, idx)
 
             # --- RIGHT MOUSE CLICK (Reset Node) ---
             elif pygame.mouse.get_pressed()[2]: 
                 pos = pygame.mouse.get_pos()
                 row, col = get_clicked_pos(pos, ROWS, width)
                 node = grid[row][col]
+                was_barrier = node.is_barrier()
                 node.reset()
+                if was_barrier:
+                    idx = cells.index(row, col)
+                    cells.set_barrier(idx, False)
+                    cell_changed(cells, idx)
+                    if planners:
+                        repair_route(grid, cells, planners, idx)
                 if node in stops:
                     stops.remove(node)
+                    planners = []
                     # Note: Removing a stop mid-list might mess up numbering. 
                     # For simplicity, clear board if you make a mistake, or assume append-only.
 
@@ -263,15 +508,23 @@ def main(win, width):
 
                 # [SPACE KEY] RUN A*
                 if event.key == pygame.K_SPACE and len(stops) > 1:
-                    for row in grid:
-                        for node in row:
-                            node.update_neighbors(grid)
-
+                    # Visit the numbered stops in the cheapest order; S and E
+                    # stay fixed. The grid is small, so no process pool here.
+                    order, _, _ = plan_multi_stop(cells, [node.get_pos() for node in stops],
+                                                  processes=1)
+                    stops = [stops[i] for i in order]
+                    for number, node in enumerate(stops[1:-1], start=1):
+                        node.make_numbered(number)
+
+                    expanded = pushed = 0
                     for i in range(len(stops) - 1):
                         start_node = stops[i]
                         end_node = stops[i+1]
                         
-                        A_star_algorithm(lambda: draw(win, grid, ROWS, width), grid, start_node, end_node)
+                        probe = SearchProbe()
+                        A_star_algorithm(renderer.draw, grid, cells, start_node, end_node, probe)
+                        expanded += probe.expansions
+                        pushed += probe.pushes
                         
                         # Clean up colors to ensure text remains visible
                         if i == 0:
@@ -282,13 +535,33 @@ def main(win, width):
                             # We want to restore the text of the start node of this leg (unless it's S)
                             pass # The reconstruct path logic handles the yellow line
 
+                    # keep a planner per leg so later wall edits only repair the route
+                    planners = [DStarLite(cells, cells.index(*a.get_pos()), cells.index(*b.get_pos()))
+                                for a, b in zip(stops, stops[1:])]
+                    for planner in planners:
+                        planner.replan()
+                    pygame.display.set_caption(f"Route planned: {expanded} cells expanded, {pushed} pushed")
+
+                # [S KEY] EXPORT THE DRAWN MAP
+                if event.key == pygame.K_s:
+                    cells.save_binary(EXPORT_PATH)
+                    pygame.display.set_caption(f"Saved map to {EXPORT_PATH}")
+
                 # [C KEY] CLEAR BOARD
                 if event.key == pygame.K_c:
                     stops = []
                     grid = make_grid(ROWS, width)
+                    renderer.reset(grid)
+                    cells = ArrayGrid(ROWS)
+                    planners = []
                     mode = 'placing_stops'
                     pygame.display.set_caption("RESCUE 1122: ROUTE BUILDER")
 
+        clock.tick(renderer.fps)
+
     pygame.quit()
 
-main(WIN, WIDTH)
\ No newline at end of file
+if __name__ == "__main__":
+    # optional size for an empty map, e.g. 1000 for the large-grid mode
+    cells = ArrayGrid(int(sys.argv[1])) if len(sys.argv) > 1 else None
+    main(init_display(WIDTH), WIDTH, cells=cells)
\ No newline at end of file
@@ -0,0 +1,289 @@
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from benchmark import ALGORITHMS, create_grid
+from instrumentation import SearchProbe
+from result_store import ResultStore, code_version
+from search_core import SearchCore
+
+# Reproducible benchmark harness. Every grid comes from a fixed seed, each
+# (size, seed, algorithm) cell gets warmup runs and N timed repetitions, and
+# results are reported as median / p95 / stddev with the peak memory of a
+# cold query. Results are saved as JSON (and optionally CSV), and the compare
+# mode flags regressions against a stored baseline. With --store every
+# finished cell is also appended to a result store (result_store.py), and
+# cells already stored for the current code version are skipped, so an
+# interrupted sweep picks up where it stopped.
+
+DEFAULT_SIZES = [50, 100, 150, 200, 250]
+
+
+# --- CASES ---
+def make_case(size, seed):
+    # same seed -> same grid, start and goal on every machine and run
+    grid = create_grid(size, seed=(seed, size))
+    start = grid.index(0, 0)
+    end = grid.index(size - 1, size - 1)
+    grid.set_barrier(start, False)
+    grid.set_barrier(end, False)
+    return grid, start, end
+
+
+# --- MEASUREMENT ---
+def percentile(values, pct):
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def summarize(times):
+    return {
+        'median_ms': statistics.median(times),
+        'p95_ms': percentile(times, 95),
+        'stddev_ms': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'mean_ms': statistics.fmean(times),
+        'min_ms': min(times),
+    }
+
+def measure(grid, start, end, algo_type, repeats=5, warmup=1):
+    # cold query on a fresh core under tracemalloc: includes the score arrays
+    tracemalloc.start()
+    core = SearchCore(grid)
+    found, visited, length = core.search(start, end, algo_type)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    for _ in range(warmup):
+        core.search(start, end, algo_type)
+
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        core.search(start, end, algo_type)
+        times.append((time.perf_counter() - t0) * 1000)
+
+    # one more run, instrumented, for the search metrics
+    probe = SearchProbe()
+    probe.begin()
+    core.search(start, end, algo_type, probe=probe)
+    probe.phase("reconstruct")
+    core.path(end)
+    probe.end()
+
+    record = {'found': found, 'nodes_visited': visited, 'path_length': length,
+              'repeats': repeats, 'peak_kb': peak / 1024}
+    record.update(summarize(times))
+    record['times_ms'] = times
+    record['metrics'] = probe.report()
+    return record
+
+def run_job(size, seed, algo_type, repeats=5, warmup=1):
+    # one (size, seed, algorithm) cell; the grid is rebuilt from its seed so
+    # pool workers only receive a few ints, never a grid
+    grid, start, end = make_case(size, seed)
+    record = {'size': size, 'seed': seed, 'algorithm': algo_type}
+    record.update(measure(grid, start, end, algo_type, repeats, warmup))
+    return record
+
+def run_suite(sizes=DEFAULT_SIZES, seeds=(0, 1, 2), algorithms=None, repeats=5, warmup=1,
+              processes=1, log=print, store=None):
+    # processes > 1 fans the jobs out over a process pool (0 = every core).
+    # Results always come back in (size, seed, algorithm) order. With a
+    # ResultStore, finished runs are appended to it one by one, and runs it
+    # already holds for this code version are reused instead of rerun.
+    algorithms = algorithms or [a for _, _, a in ALGORITHMS]
+    jobs = [(size, seed, algo_type) for size in sizes for seed in seeds
+            for algo_type in algorithms]
+    order = {job: i for i, job in enumerate(jobs)}
+    if processes == 0:
+        processes = os.cpu_count() or 1
+
+    runs = []
+    version = code_version()
+    if store is not None:
+        stored = {(r['size'], r['seed'], r['algorithm']): r for r in store.runs(version)}
+        runs = [stored[job] for job in jobs if job in stored]
+        if log and runs:
+            log(f"{len(runs)} of {len(jobs)} runs already stored for code version {version}")
+        jobs = [job for job in jobs if job not in stored]
+
+    def finished(run):
+        run['version'] = version
+        runs.append(run)
+        if store is not None:
+            store.add(run)
+        if log:
+            log(format_run(run))
+
+    if processes <= 1:
+        for job in jobs:
+            finished(run_job(*job, repeats, warmup))
+        runs.sort(key=lambda r: order[(r['size'], r['seed'], r['algorithm'])])
+        return runs
+
+    with ProcessPoolExecutor(processes) as pool:
+        # biggest grids first so the slowest jobs don't start last
+        futures = [pool.submit(run_job, *job, repeats, warmup)
+                   for job in sorted(jobs, key=lambda j: -j[0])]
+        for future in as_completed(futures):
+            finished(future.result())
+    runs.sort(key=lambda r: order[(r['size'], r['seed'], r['algorithm'])])
+    return runs
+
+
+# --- AGGREGATION ---
+def summary_rows(runs):
+    # one row per (size, algorithm) over every seed and repetition
+    groups = {}
+    for run in runs:
+        groups.setdefault((run['size'], run['algorithm']), []).append(run)
+    rows = []
+    for (size, algo_type), group in sorted(groups.items()):
+        times = [t for run in group for t in run['times_ms']]
+        row = {'size': size, 'algorithm': algo_type, 'seeds': len(group),
+               'solved': sum(run['found'] for run in group),
+               'nodes_visited': statistics.median(run['nodes_visited'] for run in group),
+               'peak_kb': max(run['peak_kb'] for run in group)}
+        row.update(summarize(times))
+        rows.append(row)
+    return rows
+
+def format_run(run):
+    return (f"{run['size']:>6} {run['seed']:>5} {run['algorithm']:<12} "
+            f"{run['median_ms']:>10.3f} {run['p95_ms']:>10.3f} {run['stddev_ms']:>9.3f} "
+            f"{run['nodes_visited']:>9} {run['path_length']:>7} {run['peak_kb']:>10.1f}")
+
+def print_summary(rows):
+    header = (f"| {'Grid':^6} | {'Algorithm':<12} | {'Median ms':>10} | {'p95 ms':>10} | "
+              f"{'Stddev':>9} | {'Nodes':>9} | {'Peak KB':>10} | {'Solved':>6} |")
+    separator = "-" * len(header)
+    print(separator)
+    print(header)
+    print(separator)
+    for row in rows:
+        print(f"| {row['size']:^6} | {row['algorithm']:<12} | {row['median_ms']:>10.3f} | "
+              f"{row['p95_ms']:>10.3f} | {row['stddev_ms']:>9.3f} | {row['nodes_visited']:>9.0f} | "
+              f"{row['peak_kb']:>10.1f} | {row['solved']:>3}/{row['seeds']:<2} |")
+    print(separator)
+
+
+# --- STORAGE ---
+def save_json(path, runs, meta):
+    with open(path, 'w') as f:
+        json.dump({'meta': meta, 'runs': runs, 'summary': summary_rows(runs)}, f, indent=1)
+
+def save_csv(path, runs):
+    fields = [k for k in runs[0] if k not in ('times_ms', 'metrics')]
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(runs)
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- COMPARE ---
+def compare(baseline, current, threshold=0.10):
+    # Returns (rows, regressions), matching runs on (size, seed, algorithm)
+    # so both sides are measured on the same grids. A (size, algorithm) cell
+    # regresses when its median time is more than `threshold` slower than the
+    # baseline, or when the nodes it visits change (the search behaves
+    # differently).
+    base = {(r['size'], r['seed'], r['algorithm']): r for r in baseline['runs']}
+    groups = {}
+    for run in current['runs']:
+        old = base.get((run['size'], run['seed'], run['algorithm']))
+        if old is not None:
+            groups.setdefault((run['size'], run['algorithm']), []).append((old, run))
+
+    rows, regressions = [], []
+    for key, pairs in sorted(groups.items()):
+        old_ms = statistics.median(t for old, _ in pairs for t in old['times_ms'])
+        new_ms = statistics.median(t for _, new in pairs for t in new['times_ms'])
+        ratio = new_ms / old_ms if old_ms else 1.0
+        flags = []
+        if ratio > 1 + threshold:
+            flags.append('SLOWER')
+        if any(old['nodes_visited'] != new['nodes_visited'] for old, new in pairs):
+            flags.append('NODES')
+        rows.append((key, old_ms, new_ms, ratio, flags))
+        if flags:
+            regressions.append(key)
+    return rows, regressions
+
+def print_compare(rows):
+    for (size, algo_type), old, new, ratio, flags in rows:
+        print(f"{size:>6} {algo_type:<12} {old:>10.3f} -> {new:>10.3f} ms "
+              f"({(ratio - 1) * 100:+6.1f}%) {' '.join(flags)}")
+
+
+# --- COMMAND LINE ---
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reproducible path-finding benchmarks")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run_p = sub.add_parser('run', help="run the suite and save the results")
+    run_p.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    run_p.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+    run_p.add_argument('--algorithms', nargs='+', default=None)
+    run_p.add_argument('--repeats', type=int, default=5)
+    run_p.add_argument('--warmup', type=int, default=1)
+    run_p.add_argument('-j', '--processes', type=int, default=1,
+                       help="worker processes for the sweep (0 = every core)")
+    run_p.add_argument('--out', default='bench_results.json')
+    run_p.add_argument('--store', default=None,
+                       help="append runs to this result store and skip runs it already holds")
+    run_p.add_argument('--csv', default=None)
+    run_p.add_argument('--baseline', default=None, help="compare against this result file")
+    run_p.add_argument('--threshold', type=float, default=0.10)
+
+    cmp_p = sub.add_parser('compare', help="compare two saved result files")
+    cmp_p.add_argument('baseline')
+    cmp_p.add_argument('current')
+    cmp_p.add_argument('--threshold', type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        meta = {'python': platform.python_version(), 'machine': platform.machine(),
+                'sizes': args.sizes, 'seeds': args.seeds, 'repeats': args.repeats,
+                'warmup': args.warmup, 'processes': args.processes,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        store = ResultStore(args.store) if args.store else None
+        runs = run_suite(args.sizes, args.seeds, args.algorithms, args.repeats, args.warmup,
+                         args.processes, store=store)
+        save_json(args.out, runs, meta)
+        if args.csv:
+            save_csv(args.csv, runs)
+        print_summary(summary_rows(runs))
+        print(f"Saved results to '{args.out}'")
+        if not args.baseline:
+            return 0
+        baseline, current = load_json(args.baseline), load_json(args.out)
+    else:
+        baseline, current = load_json(args.baseline), load_json(args.current)
+
+    rows, regressions = compare(baseline, current, args.threshold)
+    print_compare(rows)
+    if regressions:
+        print(f"{len(regressions)} regression(s) against the baseline")
+        return 1
+    print("No regressions against the baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,114 +1,185 @@
 import time
-import random
-from queue import PriorityQueue
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+
+from connectivity import cached_components, components_for
+from grid_engine import ArrayGrid
+from instrumentation import SearchProbe
+from scenarios import FAMILIES, endpoints, scenario_grids
+from search_core import core_for
 
 
 # --- SETUP ---
-class Node:
-    def __init__(self, row, col):
-        self.row = row
-        self.col = col
-        self.neighbors = []
-        self.is_barrier = False
-
-    def get_pos(self):
-        return self.row, self.col
-
-    def __lt__(self, other):
-        return False
-
-def heuristic(p1, p2):
-    x1, y1 = p1
-    x2, y2 = p2
-    return abs(x1 - x2) + abs(y1 - y2)
-
-def create_grid(rows):
-    grid = []
-    for i in range(rows):
-        grid.append([])
-        for j in range(rows):
-            node = Node(i, j)
-            # 15% barrier chance
-            if random.random() < 0.15: 
-                node.is_barrier = True
-            grid[i].append(node)
-    return grid
-
-def update_neighbors(grid, rows):
-    for row in grid:
-        for node in row:
-            if node.is_barrier:
-                continue
-            r, c = node.row, node.col
-            if r < rows - 1 and not grid[r + 1][c].is_barrier:
-                node.neighbors.append(grid[r + 1][c])
-            if r > 0 and not grid[r - 1][c].is_barrier:
-                node.neighbors.append(grid[r - 1][c])
-            if c < rows - 1 and not grid[r][c + 1].is_barrier:
-                node.neighbors.append(grid[r][c + 1])
-            if c > 0 and not grid[r][c - 1].is_barrier:
-                node.neighbors.append(grid[r][c - 1])
-
-def run_search(grid, start, end, algo_type="A_Star"):
-    count = 0
-    open_set = PriorityQueue()
-    open_set.put((0, count, start))
-    
-    g_score = {node: float("inf") for row in grid for node in row}
-    g_score[start] = 0
-    
-    f_score = {node: float("inf") for row in grid for node in row}
-    
-    h = heuristic(start.get_pos(), end.get_pos())
-    
-    if algo_type == "Dijkstra":
-        f_score[start] = 0
-    elif algo_type == "Greedy":
-        f_score[start] = h
-    else: # A_Star
-        f_score[start] = h
-
-    open_set_hash = {start}
-    nodes_visited = 0 
-
-    while not open_set.empty():
-        current = open_set.get()[2]
-        open_set_hash.remove(current)
-        nodes_visited += 1
-
-        if current == end:
-            return True, nodes_visited, g_score[end]
-
-        for neighbor in current.neighbors:
-            temp_g_score = g_score[current] + 1
-
-            if temp_g_score < g_score[neighbor]:
-                g_score[neighbor] = temp_g_score
-                
-                h_val = heuristic(neighbor.get_pos(), end.get_pos())
-                
-                if algo_type == "Dijkstra":
-                    f_score[neighbor] = temp_g_score
-                elif algo_type == "Greedy":
-                    f_score[neighbor] = h_val
-                else: # A_Star
-                    f_score[neighbor] = temp_g_score + h_val
-                
-                if neighbor not in open_set_hash:
-                    count += 1
-                    open_set.put((f_score[neighbor], count, neighbor))
-                    open_set_hash.add(neighbor)
-    
-    return False, nodes_visited, 0
+def create_grid(rows, seed=None):
+    # 15% barrier chance; a seed (int or tuple of ints) makes the grid reproducible
+    return ArrayGrid.random(rows, barrier_chance=0.15, rng=np.random.default_rng(seed))
+
+def run_search(grid, start, end, algo_type="A_Star", probe=None):
+    # heap search on the grid's shared, generation-stamped score arrays;
+    # when the grid has a component index, an end in another component is
+    # rejected without searching. With a probe (instrumentation.SearchProbe)
+    # the path is rebuilt as well, so every phase gets timed.
+    components = cached_components(grid)
+    if probe is None:
+        if components is not None and not components.reachable(start, end):
+            return False, 0, 0
+        return core_for(grid).search(start, end, algo_type)
+
+    probe.begin()
+    result = (False, 0, 0)
+    if components is None or components.reachable(start, end):
+        core = core_for(grid)
+        result = core.search(start, end, algo_type, probe=probe)
+        probe.phase("reconstruct")
+        core.path(end)
+    probe.end()
+    return result
+
+def first_solution(grid, start, end):
+    # (ms, visited, length, bound) for the anytime search's first route
+    found = []
+    t0 = time.perf_counter()
+
+    def stop(path, cost, bound, visited):
+        found.append(((time.perf_counter() - t0) * 1000, visited, cost, bound))
+        return True
+
+    core_for(grid).anytime_search(start, end, on_solution=stop)
+    return found[0] if found else (0.0, 0, 0, 0.0)
+
+# (results key, table label, algo_type) in the order they are run
+ALGORITHMS = [
+    ('dijkstra', 'Dijkstra', 'Dijkstra'),
+    ('astar', 'A*', 'A_Star'),
+    ('greedy', 'Greedy', 'Greedy'),
+    ('jps', 'JPS', 'JPS'),
+    ('bi_dijkstra', 'Bi-Dijk', 'Bi_Dijkstra'),
+    ('bi_astar', 'Bi-A*', 'Bi_A_Star'),
+    ('dial_dijkstra', 'Dial Dijk', 'Dial_Dijkstra'),
+    ('dial_astar', 'Dial A*', 'Dial_A_Star'),
+    ('alt', 'ALT', 'ALT'),
+    ('ara', 'ARA*', 'ARA_Star'),
+]
+
+BIDIRECTIONAL = ('bi_dijkstra', 'bi_astar')
+
+# (report key, column label, format) for the search metrics table
+METRICS = [
+    ('pushes', 'Pushes', 'd'),
+    ('stale_pops', 'Stale', 'd'),
+    ('reopenings', 'Reopen', 'd'),
+    ('peak_open', 'Peak open', 'd'),
+    ('peak_memory_kb', 'Peak KB', '.1f'),
+    ('setup_ms', 'Setup ms', '.3f'),
+    ('search_ms', 'Search ms', '.3f'),
+    ('reconstruct_ms', 'Path ms', '.3f'),
+]
+
+# maps per scenario family and their size, for the per-family table
+FAMILY_SIZE = 100
+FAMILY_MAPS = 5
 
 # --- EXPERIMENT RUNNER ---
-def run_experiment():
+def run_size(size, seed=0, metrics=False):
+    # One table block: every algorithm on the first seeded grid of this size
+    # where the end is reachable and Dijkstra finds it usable. Returns
+    # ({key: (ms, visited, length, (forward, backward))}, [skipped attempts]).
+    # With metrics, rows['metrics'] maps each key to a SearchProbe report
+    # from a second, instrumented run, so the timings above stay clean.
+    # Only plain values cross process boundaries, so this can run in a pool
+    # worker.
+    skipped = []
+    attempt = 0
+    while True:
+        grid = create_grid(size, seed=(seed, size, attempt))
+
+        start = grid.index(0, 0)
+        end = grid.index(size - 1, size - 1)
+        grid.set_barrier(start, False)
+        grid.set_barrier(end, False)
+
+        # the component index rules out walled-off ends without a search
+        if not components_for(grid).reachable(start, end):
+            skipped.append(attempt)
+            attempt += 1
+            continue
+        # landmark and jump tables are per-map preprocessing, kept out of the
+        # timings
+        core_for(grid).landmark_tables()
+        core_for(grid).jump_tables()
+
+        rows = {}
+        for key, label, algo_type in ALGORITHMS:
+            t0 = time.perf_counter()
+            found, visited, length = run_search(grid, start, end, algo_type)
+            t1 = time.perf_counter()
+            rows[key] = ((t1 - t0) * 1000, visited, length, core_for(grid).last_visits)
+
+            # Dijkstra runs first and decides whether the grid is usable
+            if key == 'dijkstra' and (not found or visited < size * 2):
+                break
+        if len(rows) == len(ALGORITHMS):
+            rows['ara_first'] = first_solution(grid, start, end)
+            if metrics:
+                rows['metrics'] = {}
+                for key, _, algo_type in ALGORITHMS:
+                    probe = SearchProbe()
+                    run_search(grid, start, end, algo_type, probe)
+                    report = probe.report()
+                    # tracemalloc slows the search down, so memory gets a
+                    # run of its own
+                    probe = SearchProbe(trace_memory=True)
+                    run_search(grid, start, end, algo_type, probe)
+                    report['peak_memory_kb'] = probe.report()['peak_memory_kb']
+                    rows['metrics'][key] = report
+            return rows, skipped
+        skipped.append(attempt)
+        attempt += 1
+
+def run_family(family, size=FAMILY_SIZE, seed=0, count=FAMILY_MAPS):
+    # Every algorithm, corner to corner, on one bulk-generated batch of a
+    # scenario family (scenarios.py). Returns ({key: (queries per second,
+    # mean expansions, mean path length)}, maps used); a map whose free
+    # cells are all one cell is left out. Plain values, so a pool can run it.
+    totals = {key: [0.0, 0, 0] for key, _, _ in ALGORITHMS}
+    maps = 0
+    for grid in scenario_grids(family, size, count, seed):
+        ends = endpoints(grid)
+        if ends is None or ends[0] == ends[1]:
+            continue
+        start, end = ends
+        core_for(grid).landmark_tables()
+        core_for(grid).jump_tables()
+        maps += 1
+        for key, _, algo_type in ALGORITHMS:
+            t0 = time.perf_counter()
+            _, visited, length = run_search(grid, start, end, algo_type)
+            totals[key][0] += (time.perf_counter() - t0) * 1000
+            totals[key][1] += visited
+            totals[key][2] += length
+
+    rows = {}
+    for key, (time_ms, visited, length) in totals.items():
+        rows[key] = (maps * 1000 / time_ms if time_ms else 0.0,
+                     visited / maps if maps else 0, length / maps if maps else 0)
+    return rows, maps
+
+def run_experiment(seed=0, sizes=None, processes=1, metrics=False, families=None,
+                   family_size=FAMILY_SIZE, family_maps=FAMILY_MAPS):
+    # metrics=True adds a second table per size with what each search did
+    # (instrumentation.SearchProbe) and stores it as results[key]['metrics'].
+    # A last table gives each algorithm's throughput and expansions per
+    # scenario family (all of them by default, families=() for none), stored
+    # as results['families'][family][key].
     # --- TABLE FORMATTING ---
     w_grid = 6
     w_algo = 10
     w_time = 10
     w_nodes = 13
     w_len = 11
+    w_metric = 9
 
     # header that displays the time, nodes visited, and path length   
     header = (f"| {'Grid':^{w_grid}} | {'Algorithm':<{w_algo}} | "
@@ -121,75 +192,125 @@ def run_experiment():
     print(separator)
 
     # Varying grid sizes
-    sizes = [50, 100, 150, 200, 250] 
+    if sizes is None:
+        sizes = [50, 100, 150, 200, 250] 
     
     # storage for storing plotting results 
-    results = {
-        'sizes': sizes,
-        'dijkstra': {'time': [], 'nodes_visited': [], 'path_length': []},
-        'astar': {'time': [], 'nodes_visited': [], 'path_length': []},
-        'greedy': {'time': [], 'nodes_visited': [], 'path_length': []}
-    }
+    results = {'sizes': sizes}
+    for key, _, _ in ALGORITHMS:
+        results[key] = {'time': [], 'nodes_visited': [], 'path_length': []}
+    for key in BIDIRECTIONAL:
+        results[key]['nodes_forward'] = []
+        results[key]['nodes_backward'] = []
+    results['ara_first'] = {'time': [], 'nodes_visited': [], 'path_length': [], 'bound': []}
+    if metrics:
+        for key, _, _ in ALGORITHMS:
+            results[key]['metrics'] = {name: [] for name, _, _ in METRICS}
+
+    # sizes are independent, so a pool can run them side by side; map keeps
+    # the blocks in size order either way. The with block shuts the workers
+    # down even when a job raises.
+    if processes == 1:
+        pool = nullcontext()
+        run = map
+    else:
+        pool = ProcessPoolExecutor(processes or None)
+        run = pool.map
+    with pool:
+        blocks = run(run_size, sizes, [seed] * len(sizes), [metrics] * len(sizes))
     
-    for size in sizes:
-        valid_trials = 0
-        while valid_trials < 1: 
-            grid = create_grid(size)
-            update_neighbors(grid, size)
-            
-            start = grid[0][0]
-            end = grid[size-1][size-1]
-            start.is_barrier = False
-            end.is_barrier = False
-
-            # 1. RUN DIJKSTRA
-            t0 = time.perf_counter()
-            found_d, visited_d, len_d = run_search(grid, start, end, "Dijkstra")
-            t1 = time.perf_counter()
-            time_d = (t1 - t0) * 1000
+        for size, (rows, skipped) in zip(sizes, blocks):
+            for attempt in skipped:
+                print(f"| {size:^{w_grid}} | skipped grid seed ({seed}, {size}, {attempt}): no usable route")
 
-            if not found_d or visited_d < size * 2: 
-                continue 
+            # stores data and prints rows
+            for key, label, _ in ALGORITHMS:
+                time_ms, visited, length, sides = rows[key]
+                results[key]['time'].append(time_ms)
+                results[key]['nodes_visited'].append(visited)              
+                results[key]['path_length'].append(length)
+                print(f"| {size:^{w_grid}} | {label:<{w_algo}} | {time_ms:>{w_time}.4f} | {visited:>{w_nodes}} | {length:>{w_len}} |")
 
-            # 2. RUN A*
-            t0 = time.perf_counter()
-            found_a, visited_a, len_a = run_search(grid, start, end, "A_Star")
-            t1 = time.perf_counter()
-            time_a = (t1 - t0) * 1000
+                # nodes expanded from the start side and from the goal side
+                if key in BIDIRECTIONAL:
+                    results[key]['nodes_forward'].append(sides[0])
+                    results[key]['nodes_backward'].append(sides[1])
+                    split = f"{sides[0]}/{sides[1]}"
+                    print(f"| {size:^{w_grid}} | {'  fwd/bwd':<{w_algo}} | {'':>{w_time}} | {split:>{w_nodes}} | {'':>{w_len}} |")
+
+            # JPS savings relative to A* (same optimal path length)
+            save_t = (1 - rows['jps'][0] / rows['astar'][0]) * 100
+            save_n = (1 - rows['jps'][1] / rows['astar'][1]) * 100
+            print(f"| {size:^{w_grid}} | {'JPS vs A*':<{w_algo}} | {save_t:>{w_time - 1}.1f}% | {save_n:>{w_nodes - 1}.1f}% | {'':>{w_len}} |")
+
+            # bucket queue against the heap on the same A* query; both break
+            # ties the same way and expand the same cells, so the time column
+            # is down to the queue alone
+            save_t = (1 - rows['dial_astar'][0] / rows['astar'][0]) * 100
+            save_n = (1 - rows['dial_astar'][1] / rows['astar'][1]) * 100
+            print(f"| {size:^{w_grid}} | {'Dial vs A*':<{w_algo}} | {save_t:>{w_time - 1}.1f}% | {save_n:>{w_nodes - 1}.1f}% | {'':>{w_len}} |")
+
+            # ARA*'s first (inflated-heuristic) route and its proven bound
+            time_ms, visited, length, bound = rows['ara_first']
+            for name, value in zip(('time', 'nodes_visited', 'path_length', 'bound'), rows['ara_first']):
+                results['ara_first'][name].append(value)
+            first = f"{length} x{bound:.2f}"
+            print(f"| {size:^{w_grid}} | {'ARA* 1st':<{w_algo}} | {time_ms:>{w_time}.4f} | {visited:>{w_nodes}} | {first:>{w_len}} |")
+
+            if metrics:
+                metric_header = (f"| {size:^{w_grid}} | {'Metrics':<{w_algo}} | "
+                                 + " | ".join(f"{label:>{w_metric}}" for _, label, _ in METRICS) + " |")
+                print("-" * len(metric_header))
+                print(metric_header)
+                print("-" * len(metric_header))
+                for key, label, _ in ALGORITHMS:
+                    report = rows['metrics'][key]
+                    for name, _, _ in METRICS:
+                        results[key]['metrics'][name].append(report[name])
+                    print(f"| {size:^{w_grid}} | {label:<{w_algo}} | "
+                          + " | ".join(f"{report[name]:>{w_metric}{fmt}}" for name, _, fmt in METRICS) + " |")
 
-            # 3. RUN GREEDY
-            t0 = time.perf_counter()
-            found_g, visited_g, len_g = run_search(grid, start, end, "Greedy")
-            t1 = time.perf_counter()
-            time_g = (t1 - t0) * 1000
-            
-            # stores data
-            results['dijkstra']['time'].append(time_d)
-            results['dijkstra']['nodes_visited'].append(visited_d)              
-            results['dijkstra']['path_length'].append(len_d)
-
-            results['astar']['time'].append(time_a)
-            results['astar']['nodes_visited'].append(visited_a)              
-            results['astar']['path_length'].append(len_a)
-
-            results['greedy']['time'].append(time_g)
-            results['greedy']['nodes_visited'].append(visited_g)              
-            results['greedy']['path_length'].append(len_g)
-
-            # --- PRINT ROWS ---
-            # Dijkstra
-            print(f"| {size:^{w_grid}} | {'Dijkstra':<{w_algo}} | {time_d:>{w_time}.4f} | {visited_d:>{w_nodes}} | {len_d:>{w_len}} |")
-            
-            # A*
-            print(f"| {size:^{w_grid}} | {'A*':<{w_algo}} | {time_a:>{w_time}.4f} | {visited_a:>{w_nodes}} | {len_a:>{w_len}} |")
-            
-            # Greedy
-            print(f"| {size:^{w_grid}} | {'Greedy':<{w_algo}} | {time_g:>{w_time}.4f} | {visited_g:>{w_nodes}} | {len_g:>{w_len}} |")
-            
             print(separator)
-            
-            valid_trials += 1
+
+        # --- SCENARIO FAMILIES ---
+        families = list(FAMILIES) if families is None else list(families)
+        if families:
+            w_family = 8
+            family_header = (f"| {'Family':<{w_family}} | {'Algorithm':<{w_algo}} | "
+                             f"{'Queries/s':>{w_time}} | {'Expansions':>{w_nodes}} | {'Path Length':>{w_len}} |")
+            print()
+            print(f"Scenario families: {family_maps} maps of {family_size}x{family_size} each, corner to corner")
+            print("-" * len(family_header))
+            print(family_header)
+            print("-" * len(family_header))
+            results['families'] = {}
+            blocks = run(run_family, families, [family_size] * len(families), [seed] * len(families),
+                         [family_maps] * len(families))
+            for family, (rows, maps) in zip(families, blocks):
+                results['families'][family] = {}
+                if not maps:
+                    print(f"| {family:<{w_family}} | no map with a usable route")
+                for key, label, _ in ALGORITHMS:
+                    rate, visited, length = rows[key]
+                    results['families'][family][key] = {'throughput': rate, 'expansions': visited,
+                                                        'path_length': length}
+                    if maps:
+                        print(f"| {family:<{w_family}} | {label:<{w_algo}} | {rate:>{w_time}.1f} | "
+                              f"{visited:>{w_nodes}.1f} | {length:>{w_len}.1f} |")
+                print("-" * len(family_header))
+
     return results  
 
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Path-finding comparison tables")
+    parser.add_argument('--metrics', action='store_true',
+                        help="add a table of what each search did per grid size")
+    parser.add_argument('-j', '--processes', type=int, default=1,
+                        help="worker processes for the grid sizes and families (0 = every core)")
+    args = parser.parse_args(argv)
+    run_experiment(processes=args.processes, metrics=args.metrics)
+
 if __name__ == "__main__":
-    run_experiment()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,210 @@
+import weakref
+from collections import deque
+
+import numpy as np
+
+# --- CONNECTED COMPONENTS ---
+# One int32 component label per cell (-1 for barriers), so "can start reach
+# goal" is two lookups before any search runs. Labels are built once per map
+# with numpy: horizontal runs of free cells get an id each, and runs that
+# touch vertically are merged by hooking roots onto the smallest root they
+# touch and pointer jumping, until no touching runs disagree.
+#
+# Edits are applied incrementally through cell_changed(idx). Clearing a cell
+# unions its neighbours' components (a small parent map on top of the labels,
+# so nothing is relabelled). Blocking a cell can split a component: a BFS
+# runs from each of its free neighbours in lockstep until all but one have
+# met or run dry. Any side that runs dry is cut off and gets a fresh label,
+# so the work is bounded by the smaller side rather than the map.
+#
+# The index is only built on request (components_for). The planners check
+# cached_components() and use an index that is already there, and just
+# search when there is none, so a big map costs nothing until asked.
+
+
+# rows per band are picked so a band covers about this many cells; every
+# temporary below is band-sized, so labelling needs little beyond the int32
+# result
+BAND_CELLS = 1 << 20
+
+
+def label_components(grid):
+    # int32 labels per cell, -1 for barriers; labels are run ids, so they are
+    # not consecutive
+    rows, cols = grid.rows, grid.cols
+    cells = grid.as_2d()
+    out = np.full(grid.size, -1, dtype=np.int32)
+    labels = out.reshape(rows, cols)
+    band = max(1, BAND_CELLS // max(cols, 1))
+
+    # run ids, band by band, written straight into out
+    runs = 0
+    for r0 in range(0, rows, band):
+        free = cells[r0:r0 + band] == 0
+        starts = free.copy()
+        starts[:, 1:] &= ~free[:, :-1]
+        ids = np.cumsum(starts, dtype=np.int32).reshape(free.shape)
+        ids += runs - 1
+        runs = int(ids[-1, -1]) + 1
+        np.copyto(labels[r0:r0 + band], ids, where=free)
+
+    # pairs of runs that touch vertically, band by band (a band also looks
+    # at the row below it)
+    a_parts, b_parts = [], []
+    for r0 in range(0, rows - 1, band):
+        upper = labels[r0:min(r0 + band, rows - 1)]
+        lower = labels[r0 + 1:r0 + 1 + len(upper)]
+        touch = (upper >= 0) & (lower >= 0)
+        # a contact continuing from the column to its left joins the same two
+        # runs again; keep only the first column of each contact
+        touch[:, 1:] &= ~touch[:, :-1]
+        a_parts.append(upper[touch])
+        b_parts.append(lower[touch])
+
+    label = np.arange(runs, dtype=np.int32)
+    a = np.concatenate(a_parts) if a_parts else label[:0]
+    del a_parts
+    b = np.concatenate(b_parts) if b_parts else label[:0]
+    del b_parts
+    spare = np.empty_like(label)
+    while len(a):
+        # a and b hold roots here; hook each root to the smallest root it
+        # touches, then flatten the trees again
+        np.minimum.at(label, a, b)
+        np.minimum.at(label, b, a)
+        while True:
+            np.take(label, label, out=spare)
+            if np.array_equal(spare, label):
+                break
+            label, spare = spare, label
+        # pairs now under one root are done for good
+        np.take(label, a, out=a, mode='clip')
+        np.take(label, b, out=b, mode='clip')
+        apart = a != b
+        a, b = a[apart], b[apart]
+    del spare
+
+    # run ids -> component labels, in place
+    for r0 in range(0, rows, band):
+        part = labels[r0:r0 + band]
+        free = part >= 0
+        part[free] = label[part[free]]
+    return out
+
+
+class ComponentIndex:
+    def __init__(self, grid):
+        self.grid = grid
+        self.build()
+
+    def build(self):
+        self.labels = label_components(self.grid)
+        self.view = memoryview(self.labels)
+        self.next_label = int(self.labels.max()) + 1 if self.grid.size else 0
+        # merged labels point at the label they were joined to
+        self.parent = {}
+        self.version = self.grid.version
+
+    # --- QUERIES ---
+    def find(self, label):
+        parent = self.parent
+        root = label
+        while root in parent:
+            root = parent[root]
+        while label != root:
+            parent[label], label = root, parent[label]
+        return root
+
+    def component(self, idx):
+        # -1 for a barrier cell
+        if self.grid.version != self.version:
+            self.build()
+        label = self.view[idx]
+        return -1 if label < 0 else self.find(label)
+
+    def reachable(self, start, goal):
+        a = self.component(start)
+        return a >= 0 and a == self.component(goal)
+
+    # --- EDITS ---
+    def cell_changed(self, idx):
+        # call after the grid cell idx was blocked or cleared
+        grid = self.grid
+        if grid.version != self.version + 1:
+            self.build()
+            return
+        self.version = grid.version
+
+        blocked = grid.is_barrier(idx)
+        if blocked == (self.view[idx] < 0):
+            return  # a cost change; connectivity is untouched
+        near = grid.neighbors(idx)
+        if blocked:
+            self.view[idx] = -1
+            if len(near) > 1:
+                self._split(near)
+            return
+
+        roots = {self.find(self.view[nb]) for nb in near}
+        if not roots:
+            self.view[idx] = self.next_label
+            self.next_label += 1
+            return
+        keep = min(roots)
+        for root in roots:
+            if root != keep:
+                self.parent[root] = keep
+        self.view[idx] = keep
+
+    def _split(self, near):
+        # lockstep BFS from each neighbour of a newly blocked cell; searches
+        # that meet are merged, and one that runs dry while others are
+        # still going is a piece that has been cut off
+        grid = self.grid
+        queues = [deque([nb]) for nb in near]
+        owner = {nb: i for i, nb in enumerate(near)}
+        group = list(range(len(near)))
+
+        def root(i):
+            while group[i] != i:
+                i = group[i]
+            return i
+
+        live = set(range(len(near)))
+        while len(live) > 1:
+            for i in range(len(near)):
+                if not queues[i]:
+                    continue
+                current = queues[i].popleft()
+                for nb in grid.neighbors(current):
+                    j = owner.get(nb)
+                    if j is None:
+                        owner[nb] = i
+                        queues[i].append(nb)
+                    elif root(j) != root(i):
+                        a, b = root(i), root(j)
+                        group[b] = a
+                        live.discard(b)
+
+            for r in list(live):
+                members = [i for i in range(len(near)) if root(i) == r]
+                if len(live) > 1 and not any(queues[i] for i in members):
+                    cells = [c for c, i in owner.items() if root(i) == r]
+                    self.labels[cells] = self.next_label
+                    self.next_label += 1
+                    live.discard(r)
+
+
+_indexes = weakref.WeakKeyDictionary()
+
+def components_for(grid):
+    # one index per grid; it rebuilds itself if the grid changed behind it
+    index = _indexes.get(grid)
+    if index is None:
+        index = ComponentIndex(grid)
+        _indexes[grid] = index
+    return index
+
+def cached_components(grid):
+    # the grid's index if components_for() has built one, else None
+    return _indexes.get(grid)
@@ -0,0 +1,217 @@
+import sys
+import weakref
+
+import numpy as np
+
+from landmarks import UNREACHED
+
+# --- DISTANCE FIELDS ---
+# One-to-all travel distances as numpy arrays: from a set of sources (e.g.
+# ambulance bases) to every cell of the map, without one search per goal.
+# Every cell gets the distance from its nearest source and that source's
+# position in the list (owner); cells no source reaches keep UNREACHED / -1.
+# With reverse=True distances run to the sources instead, which only differs
+# on grids with per-cell costs.
+#
+# Two backends:
+#   frontier - level-synchronous BFS done a whole frontier at a time with
+#              numpy. Unit-cost grids only; fastest on open maps, where the
+#              frontier is wide and there are few levels.
+#   csgraph  - scipy.sparse.csgraph.dijkstra over the map's adjacency matrix
+#              (cached per grid). Handles costs and winding maps (mazes,
+#              serpentines) whose BFS has a level per cell.
+# "auto" runs the frontier BFS on unit-cost grids and hands over to csgraph
+# once it has gone MAX_LEVELS_PER_SPAN x (rows + cols) levels deep, which an
+# open map never does. Ties between equally near sources go to either one.
+MAX_LEVELS_PER_SPAN = 2
+METHODS = ("auto", "frontier", "csgraph")
+
+
+def frontier_field(grid, sources, max_levels=None):
+    # sources are cell ids; returns flat (dist, owner), or None once
+    # max_levels levels have been expanded without finishing
+    if grid.cost_flat is not None:
+        raise ValueError("frontier BFS needs a unit-cost grid")
+    cols, size = grid.cols, grid.size
+    unseen = grid.cells == 0
+    dist = np.full(size, UNREACHED, dtype=np.uint32)
+    owner = np.full(size, -1, dtype=np.int32)
+
+    seeds = []
+    for i, source in enumerate(sources):
+        if unseen[source]:
+            unseen[source] = False
+            dist[source] = 0
+            owner[source] = i
+            seeds.append(source)
+    frontier = np.array(seeds, dtype=np.intp)
+    stamp = np.empty(size, dtype=np.intp)
+
+    level = 0
+    while len(frontier):
+        level += 1
+        if max_levels is not None and level > max_levels:
+            return None
+        col = frontier % cols
+        moves = (
+            (frontier >= cols, -cols),
+            (frontier < size - cols, cols),
+            (col > 0, -1),
+            (col < cols - 1, 1),
+        )
+        parent = np.concatenate([frontier[ok] for ok, _ in moves])
+        cell = np.concatenate([frontier[ok] + step for ok, step in moves])
+        keep = unseen[cell]
+        parent, cell = parent[keep], cell[keep]
+        # a cell reached from several frontier cells: keep one of them
+        order = np.arange(len(cell))
+        stamp[cell] = order
+        keep = stamp[cell] == order
+        parent, cell = parent[keep], cell[keep]
+
+        unseen[cell] = False
+        dist[cell] = level
+        owner[cell] = owner[parent]
+        frontier = cell
+    return dist, owner
+
+
+# --- SPARSE GRAPH ---
+class GridGraph:
+    # CSR adjacency of a grid's free cells; an edge's weight is the cost of
+    # the cell it enters (1 on unit-cost grids)
+    def __init__(self, grid):
+        self.grid = grid
+        self.build()
+
+    def build(self):
+        from scipy.sparse import csr_matrix
+
+        grid = self.grid
+        free = grid.as_2d() == 0
+        ids = np.arange(grid.size).reshape(grid.rows, grid.cols)
+        across = free[:, :-1] & free[:, 1:]
+        down = free[:-1] & free[1:]
+        a = np.concatenate((ids[:, :-1][across], ids[:-1][down]))
+        b = np.concatenate((ids[:, 1:][across], ids[1:][down]))
+        tails = np.concatenate((a, b))
+        heads = np.concatenate((b, a))
+        if grid.costs is None:
+            weights = np.ones(len(heads))
+        else:
+            weights = grid.costs[heads].astype(np.float64)
+        self.forward = csr_matrix((weights, (tails, heads)), shape=(grid.size, grid.size))
+        self.backward = None
+        self.version = grid.version
+
+    def matrix(self, reverse=False):
+        if self.grid.version != self.version:
+            self.build()
+        if not reverse:
+            return self.forward
+        if self.backward is None:
+            self.backward = self.forward.transpose().tocsr()
+        return self.backward
+
+
+_graphs = weakref.WeakKeyDictionary()
+
+def graph_for(grid):
+    graph = _graphs.get(grid)
+    if graph is None:
+        graph = GridGraph(grid)
+        _graphs[grid] = graph
+    return graph
+
+
+def csgraph_field(grid, sources, reverse=False):
+    from scipy.sparse.csgraph import dijkstra
+
+    dist = np.full(grid.size, UNREACHED, dtype=np.uint32)
+    owner = np.full(grid.size, -1, dtype=np.int32)
+    position = {}
+    for i, source in enumerate(sources):
+        if grid.cells[source] == 0:
+            position.setdefault(source, i)
+    if not position:
+        return dist, owner
+
+    ids = np.fromiter(position, dtype=np.intp)
+    found, _, origin = dijkstra(graph_for(grid).matrix(reverse), indices=ids, min_only=True,
+                                return_predecessors=True)
+    reached = np.isfinite(found)
+    dist[reached] = found[reached]
+    lookup = np.full(grid.size, -1, dtype=np.int32)
+    lookup[ids] = np.fromiter(position.values(), dtype=np.int32)
+    owner[reached] = lookup[origin[reached]]
+    return dist, owner
+
+
+def cell_field(grid, ids, reverse=False, method="auto"):
+    # distance_field on cell ids, returning flat (dist, owner)
+    if method not in METHODS:
+        raise ValueError(f"unknown method {method!r}, expected one of {METHODS}")
+    result = None
+    if method == "frontier" or (method == "auto" and grid.cost_flat is None):
+        limit = None
+        if method == "auto" and have_scipy():
+            limit = MAX_LEVELS_PER_SPAN * (grid.rows + grid.cols)
+        result = frontier_field(grid, ids, limit)
+    if result is None:
+        result = csgraph_field(grid, ids, reverse)
+    return result
+
+def distance_field(grid, sources, reverse=False, method="auto"):
+    # sources are (row, col); returns (dist, owner) as rows x cols arrays
+    dist, owner = cell_field(grid, [grid.index(*s) for s in sources], reverse, method)
+    return dist.reshape(grid.rows, grid.cols), owner.reshape(grid.rows, grid.cols)
+
+def have_scipy():
+    try:
+        import scipy.sparse.csgraph  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+# --- COMMAND LINE ---
+def main(argv=None):
+    import argparse
+    import time
+
+    from route_planner import load_map, parse_stop
+
+    parser = argparse.ArgumentParser(description="Travel distance from the nearest source to every cell")
+    parser.add_argument("map", help="binary or text map")
+    parser.add_argument("sources", nargs="+", help="sources (e.g. stations) as row,col")
+    parser.add_argument("--method", choices=METHODS, default="auto")
+    parser.add_argument("--reverse", action="store_true",
+                        help="distances to the sources instead of from them")
+    parser.add_argument("--npy", metavar="PATH", help="save the distances as a .npy array")
+    parser.add_argument("--png", metavar="PATH", nargs="?", const="distance_field.png",
+                        help="plot the heatmap (default file distance_field.png)")
+    args = parser.parse_args(argv)
+
+    grid = load_map(args.map)
+    sources = [parse_stop(s) for s in args.sources]
+    for row, col in sources:
+        if not (0 <= row < grid.rows and 0 <= col < grid.cols):
+            parser.error(f"source {row},{col} is outside the {grid.rows}x{grid.cols} map")
+
+    t0 = time.perf_counter()
+    dist, owner = distance_field(grid, sources, args.reverse, args.method)
+    elapsed = (time.perf_counter() - t0) * 1000
+    reached = dist != UNREACHED
+    print(f"{grid.rows}x{grid.cols} map, {len(sources)} sources: {int(reached.sum())} cells reached "
+          f"in {elapsed:.1f} ms, farthest {int(dist[reached].max()) if reached.any() else 0}")
+
+    if args.npy:
+        np.save(args.npy, dist)
+        print(f"Saved distances to '{args.npy}'")
+    if args.png:
+        from graphs import plot_distance_field
+        plot_distance_field(grid, dist, sources, filename=args.png)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
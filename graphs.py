@@ -1,7 +1,19 @@
+import sys
+
+import matplotlib
+# headless: figures are written to PNG files, never shown
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.interpolate import make_interp_spline
-from benchmark import run_experiment
+
+from benchmark import ALGORITHMS
+from result_store import DEFAULT_STORE, ResultStore
+
+# Plots are drawn from the benchmark result store (result_store.py), so
+# making a graph doesn't rerun the sweep. Every point is the mean over the
+# stored seeds (and, for runtime, every timed repetition) with a one-stddev
+# error bar. `python graphs.py --sweep` first runs whatever cells the store
+# is missing for the current code version; an interrupted sweep resumes.
 
 plt.rcParams.update({
     'font.size': 11,
@@ -23,124 +35,197 @@ plt.rcParams.update({
     'savefig.bbox': 'tight',
     })
 
-def smooth_curve (x, y, num_points=300):
-    x_array = np.array(x)
-    y_array = np.array(y)   
-    x_smooth = np.linspace(np.min(x), np.max(x), num_points)
-    spline = make_interp_spline(x_array, y_array, k=3)
-    y_smooth = spline(x_smooth)
-    return x_smooth, y_smooth
+LABELS = {algo_type: label for _, label, algo_type in ALGORITHMS}
+# (marker, colour, line style) for the three algorithms the comparison graphs show
+STYLES = {
+    'Dijkstra': ('o', 'blue', '-'),
+    'A_Star': ('s', 'gold', '--'),
+    'Greedy': ('^', 'red', '-'),
+}
+COMPARED = ('Dijkstra', 'A_Star', 'Greedy')
 
-# Graph 1 for runtime
-def plot_runtime_comparison(sizes, rt_dijkstra, rt_astar, rt_greedy):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    x1, y1 = smooth_curve(sizes, rt_dijkstra)
-    x2, y2 = smooth_curve(sizes, rt_astar)
-    x3, y3 = smooth_curve(sizes, rt_greedy) 
-    
-    ax.plot(x1, y1, '-', color='blue', linewidth=2)
-    ax.plot(x2, y2, '--', color='gold', linewidth=2)
-    ax.plot(x3, y3, '-', color='red', linewidth=2)
-    
-    ax.plot(sizes, rt_dijkstra, 'o', color='blue', linewidth=2, markersize=8, label='Dijkstra')
-    ax.plot(sizes, rt_astar, 's', color='gold', linewidth=2, markersize=8, label='A*')
-    ax.plot(sizes, rt_greedy, '^', color='red', linewidth=2, markersize=8, label='Greedy')
-    
-    ax.set_title('Runtime Comparison of A* vs Other Pathfinding Algorithms', fontsize=14, fontweight='bold')
-    ax.set_xlabel('Grid Size (N x N)', fontsize=12)
-    ax.set_ylabel('Runtime (ms)', fontsize=12)
-    ax.grid(True, alpha=0.3)
+# --- AGGREGATION ---
+def samples(run, field):
+    # every sample a run holds for field: the timed repetitions for 'time',
+    # one value otherwise (search metrics as 'metrics.<name>')
+    if field == 'time':
+        return run['times_ms']
+    if field.startswith('metrics.'):
+        return [run['metrics'][field[8:]]]
+    return [run[field]]
+
+def aggregate(runs, field):
+    # {algo_type: (sizes, means, stddevs)}, sizes ascending; seeds the
+    # algorithm found no route on are left out
+    groups = {}
+    for run in runs:
+        if field.startswith('metrics.') and 'metrics' not in run:
+            continue
+        if not run['found']:
+            continue
+        groups.setdefault(run['algorithm'], {}).setdefault(run['size'], []).extend(samples(run, field))
+    series = {}
+    for algo_type, by_size in groups.items():
+        sizes = sorted(by_size)
+        values = [np.asarray(by_size[size], dtype=float) for size in sizes]
+        series[algo_type] = (sizes, [v.mean() for v in values], [v.std() for v in values])
+    return series
+
+def style_axes(ax, sizes, xlabel='Grid Size (N x N)'):
+    ax.set_xlabel(xlabel, fontsize=12)
     ax.set_xticks(sizes)
-    ax.legend(loc='upper left', fontsize=10, title='Algorithm')     
-    
     ax.minorticks_on()
     ax.grid(True, which='major', linestyle='-', linewidth=0.5)
     ax.grid(True, which='minor', linestyle=':', linewidth=0.3)
-    
-    plt.tight_layout()
-    plt.savefig('runtime_comparison.png', dpi=150)
-    plt.show()
-    print("Saved runtime comparison plot as 'runtime_comparison.png'")
 
-# Graph 2 for nodes visited    
-def plot_nodes_visited_comparison(sizes, nv_dijkstra, nv_astar, nv_greedy):
+# --- COMPARISON GRAPHS ---
+def plot_comparison(runs, field, title, ylabel, filename, offset=0):
+    # Dijkstra vs A* vs Greedy; offset shifts Dijkstra sideways where it
+    # would sit on top of A* (identical optimal path lengths)
     fig, ax = plt.subplots(figsize=(10, 6))
-    
-    x1, y1 = smooth_curve(sizes, nv_dijkstra)
-    x2, y2 = smooth_curve(sizes, nv_astar)
-    x3, y3 = smooth_curve(sizes, nv_greedy)
-    
-    ax.plot(x1, y1, '-', color='blue', linewidth=2)
-    ax.plot(x2, y2, '--', color='gold', linewidth=2)
-    ax.plot(x3, y3, '-', color='red', linewidth=2)
-    
-    ax.plot(sizes, nv_dijkstra, 'o', label='Dijkstra', color='blue', linewidth=2, markersize=8)
-    ax.plot(sizes, nv_astar, 's', label='A*', color='gold', linewidth=2, markersize=8)
-    ax.plot(sizes, nv_greedy, '^', label='Greedy', color='red', linewidth=2, markersize=8)
-    
-    ax.set_title('Nodes Visited Comparison of A* vs Other Pathfinding Algorithms', fontsize=14, fontweight='bold')
-    ax.set_xlabel('Grid Size (N x N)', fontsize=12)
-    ax.set_ylabel('Nodes Visited', fontsize=12)
-    ax.grid(True, alpha=0.3)
-    ax.set_xticks(sizes)
+    series = aggregate(runs, field)
+    all_sizes = sorted({size for sizes, _, _ in series.values() for size in sizes})
+
+    for algo_type in COMPARED:
+        if algo_type not in series:
+            continue
+        sizes, means, errs = series[algo_type]
+        marker, color, line = STYLES[algo_type]
+        shift = -offset if algo_type == 'Dijkstra' else 0
+        ax.errorbar(np.asarray(sizes) + shift, means, yerr=errs, fmt=line + marker, color=color,
+                    linewidth=2, markersize=8, capsize=4, label=LABELS[algo_type])
+
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.set_ylabel(ylabel, fontsize=12)
+    style_axes(ax, all_sizes)
     ax.legend(loc='upper left', fontsize=10, title='Algorithm')
-    
+
     plt.tight_layout()
-    plt.savefig('nodes_visited_comparison.png', dpi=150)
-    plt.show()
-    print("Saved nodes visited comparison plot as 'nodes_visited_comparison.png'")
-    
-# Graph 3 for path length        
-def plot_path_length_comparison(sizes, pl_dijkstra, pl_astar, pl_greedy):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    sizes_array = np.array(sizes)
-    offset = 2
-    
-    x1, y1 = smooth_curve(sizes, pl_dijkstra)
-    x2, y2 = smooth_curve(sizes, pl_astar)
-    x3, y3 = smooth_curve(sizes, pl_greedy)
-    
-    ax.plot(x1 - offset, y1, '-', color='blue', linewidth=2)
-    ax.plot(x2, y2, '--', color='gold', linewidth=2)
-    ax.plot(x3, y3, '-', color='red', linewidth=2)
-    
-    ax.plot(sizes_array - offset, pl_dijkstra, 'o', color='blue', linewidth=2, markersize=8, label='Dijkstra')
-    ax.plot(sizes_array, pl_astar, 's', color='gold', linewidth=2, markersize=8, label='A*')
-    ax.plot(sizes_array, pl_greedy, '^', color='red', linewidth=2, markersize=8, label='Greedy')
-    
-    ax.set_title('Path Length Comparison of A* vs Other Pathfinding Algorithms', fontsize=14, fontweight='bold')
-    ax.set_xlabel('Grid Size (N x N)', fontsize=12)
-    ax.set_ylabel('Path Length', fontsize=12)
-    ax.grid(True, alpha=0.3)
-    ax.set_xticks(sizes)
-    ax.legend(loc='upper left', fontsize=10, title='Algorithm')
-    
-    ax.minorticks_on()
-    ax.grid(True, which='major', linestyle='-', linewidth=0.5)
-    ax.grid(True, which='minor', linestyle=':', linewidth=0.3)
-    
-    
+    plt.savefig(filename, dpi=150)
+    plt.close(fig)
+    print(f"Saved {ylabel.lower()} plot as '{filename}'")
+
+# Graph 1 for runtime
+def plot_runtime_comparison(runs):
+    plot_comparison(runs, 'time', 'Runtime Comparison of A* vs Other Pathfinding Algorithms',
+                    'Runtime (ms)', 'runtime_comparison.png')
+
+# Graph 2 for nodes visited
+def plot_nodes_visited_comparison(runs):
+    plot_comparison(runs, 'nodes_visited', 'Nodes Visited Comparison of A* vs Other Pathfinding Algorithms',
+                    'Nodes Visited', 'nodes_visited_comparison.png')
+
+# Graph 3 for path length
+def plot_path_length_comparison(runs):
+    plot_comparison(runs, 'path_length', 'Path Length Comparison of A* vs Other Pathfinding Algorithms',
+                    'Path Length', 'path_length_comparison.png', offset=2)
+
+# Graph 4 for search metrics (instrumentation.SearchProbe)
+METRIC_PANELS = [
+    ('metrics.pushes', 'Heap Pushes'),
+    ('metrics.peak_open', 'Peak Open-Set Size'),
+    ('peak_kb', 'Peak Memory, Cold Query (KB)'),
+    ('metrics.search_ms', 'Search Phase (ms)'),
+]
+
+def plot_search_metrics(runs):
+    fig, axes = plt.subplots(2, 2, figsize=(14, 9))
+    markers = 'os^vD<>ph*'
+    order = [algo_type for _, _, algo_type in ALGORITHMS]
+
+    for ax, (field, title) in zip(axes.ravel(), METRIC_PANELS):
+        series = aggregate(runs, field)
+        all_sizes = sorted({size for sizes, _, _ in series.values() for size in sizes})
+        for i, algo_type in enumerate(sorted(series, key=lambda a: order.index(a) if a in order else len(order))):
+            sizes, means, errs = series[algo_type]
+            ax.errorbar(sizes, means, yerr=errs, fmt='-' + markers[i % len(markers)],
+                        linewidth=1.5, markersize=6, capsize=3, label=LABELS.get(algo_type, algo_type))
+        ax.set_title(title, fontsize=12, fontweight='bold')
+        style_axes(ax, all_sizes)
+
+    axes[0][0].legend(loc='upper left', fontsize=9, title='Algorithm', ncol=2)
+    fig.suptitle('Search Metrics per Algorithm', fontsize=14, fontweight='bold')
+
     plt.tight_layout()
-    plt.savefig('path_length_comparison.png', dpi=150)
-    plt.show()
-    print("Saved path length comparison plot as 'path_length_comparison.png'")
- 
-# Generate all 3 graphs from benchmark.py    
-def generate_graphs(results):
-    sizes = results['sizes']
-    
+    plt.savefig('search_metrics.png', dpi=150)
+    plt.close(fig)
+    print("Saved search metrics plot as 'search_metrics.png'")
+
+# --- DISTANCE HEATMAP ---
+def plot_distance_field(grid, dist, sources=(), filename='distance_field.png',
+                        title='Travel Distance from the Nearest Station'):
+    # dist as returned by distance_fields.distance_field; walls are drawn
+    # black, free cells no source reaches grey
+    from landmarks import UNREACHED
+
+    walls = grid.as_2d() != 0
+    field = np.ma.masked_where((dist == UNREACHED) | walls, dist)
+    cmap = plt.get_cmap('viridis').copy()
+    cmap.set_bad('lightgrey')
+
+    fig, ax = plt.subplots(figsize=(8, 7))
+    image = ax.imshow(field, cmap=cmap, interpolation='nearest')
+    ax.imshow(np.ma.masked_where(~walls, walls), cmap='gray_r', vmin=0, vmax=1,
+              interpolation='nearest')
+    if len(sources):
+        rows, cols = zip(*sources)
+        ax.scatter(cols, rows, marker='*', s=120, color='red', edgecolors='white', label='Station',
+                   clip_on=False, zorder=3)
+        ax.legend(loc='upper right', fontsize=10)
+    fig.colorbar(image, ax=ax, label='Travel Distance (cells)')
+
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.set_xlabel('Column', fontsize=12)
+    ax.set_ylabel('Row', fontsize=12)
+    ax.grid(False)
+
+    plt.tight_layout()
+    plt.savefig(filename, dpi=150)
+    plt.close(fig)
+    print(f"Saved distance heatmap as '{filename}'")
+
+# Generate all graphs from stored benchmark runs
+def generate_graphs(runs):
     print("\n" + "="*50)
     print("Generating Graphs...")
-    print("="*50 + "\n")   
-    
-    # Plot all three graphs
-    plot_runtime_comparison(sizes, results['dijkstra']['time'], results['astar']['time'], results['greedy']['time'])
-    plot_nodes_visited_comparison(sizes, results['dijkstra']['nodes_visited'], results['astar']['nodes_visited'], results['greedy']['nodes_visited'])
-    plot_path_length_comparison(sizes, results['dijkstra']['path_length'], results['astar']['path_length'], results['greedy']['path_length']) 
-    
+    print("="*50 + "\n")
+
+    plot_runtime_comparison(runs)
+    plot_nodes_visited_comparison(runs)
+    plot_path_length_comparison(runs)
+    if any('metrics' in run for run in runs):
+        plot_search_metrics(runs)
+
+def main(argv=None):
+    import argparse
+    from bench_suite import DEFAULT_SIZES, run_suite
+    from result_store import code_version
+
+    parser = argparse.ArgumentParser(description="Plot benchmark results from the result store")
+    parser.add_argument('--store', default=DEFAULT_STORE)
+    parser.add_argument('--version', default=None,
+                        help="code version to plot (default: the newest in the store)")
+    parser.add_argument('--sweep', action='store_true',
+                        help="first run the cells the store lacks for the current code")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('-j', '--processes', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.store)
+    version = args.version
+    if args.sweep or not store.records:
+        run_suite(args.sizes, args.seeds, repeats=args.repeats, processes=args.processes,
+                  store=store)
+        version = version or code_version()
+    runs = store.runs(version)
+    if not runs:
+        print(f"No runs for code version {version} in '{args.store}'")
+        return 1
+    print(f"Plotting {len(runs)} runs of code version {runs[0]['version']} from '{args.store}'")
+    generate_graphs(runs)
+    return 0
+
 if __name__ == "__main__":
-    results = run_experiment()
-    
-    generate_graphs(results)
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import os
+import struct
+
+import numpy as np
+
+# --- CELL STATES ---
+FREE = 0
+BARRIER = 1
+
+# --- BINARY MAP FORMAT ---
+# A 64-byte little-endian header (magic, format version, flags, rows, cols)
+# followed by one uint8 per cell, row-major, exactly as ArrayGrid holds it;
+# with HAS_COSTS a second block of uint8 entry costs follows. Cells stay
+# uint8 rather than bit-packed so a memory-mapped file can back the grid
+# directly, with no unpacking pass.
+MAP_MAGIC = b"R1122MAP"
+MAP_VERSION = 1
+MAP_HEADER = struct.Struct("<8sHHII")
+MAP_HEADER_SIZE = 64
+HAS_COSTS = 1
+
+
+# --- ARRAY GRID ---
+# Occupancy is one uint8 per cell in a flat array; a cell is addressed by its
+# flat id (row * cols + col) and its neighbors are worked out from the array
+# on demand instead of being stored per cell. An optional uint8 `costs` array
+# holds the integer cost of entering each cell (traffic weighting); without
+# it every move costs 1.
+class ArrayGrid:
+    def __init__(self, rows, cols=None, cells=None, costs=None):
+        self.rows = rows
+        self.cols = rows if cols is None else cols
+        self.size = self.rows * self.cols
+
+        if cells is None:
+            cells = np.zeros(self.size, dtype=np.uint8)
+        self.cells = cells
+
+        # memoryview indexing hands back plain ints, which is much cheaper
+        # than numpy scalar access inside the search loops
+        self.flat = memoryview(cells)
+
+        self.costs = costs
+        self.cost_flat = None if costs is None else memoryview(costs)
+
+        # bumped on every edit so callers can tell when cached data is stale
+        self.version = 0
+
+    # --- CONSTRUCTORS ---
+    @classmethod
+    def random(cls, rows, barrier_chance=0.15, rng=None):
+        if rng is None:
+            rng = np.random.default_rng()
+        cells = (rng.random(rows * rows) < barrier_chance).astype(np.uint8)
+        return cls(rows, rows, cells)
+
+    @classmethod
+    def from_text(cls, lines):
+        # one line per row, '#' or '1' marks a barrier, anything else is free
+        lines = [line.rstrip("\r\n") for line in lines]
+        lines = [line for line in lines if line]
+        rows = len(lines)
+        cols = max((len(line) for line in lines), default=0)
+        cells = np.zeros((rows, cols), dtype=np.uint8)
+        for r, line in enumerate(lines):
+            row = np.frombuffer(line.encode("ascii"), dtype=np.uint8)
+            cells[r, :len(line)] = (row == ord("#")) | (row == ord("1"))
+        return cls(rows, cols, cells.ravel())
+
+    def to_text(self):
+        return "\n".join("".join("#" if cell else "." for cell in row)
+                         for row in self.as_2d())
+
+    @classmethod
+    def open_binary(cls, path, mode="c"):
+        # Memory-maps a binary map: nothing is read up front, so opening is
+        # O(1) and pages load as searches touch them. mode "c" keeps edits
+        # in memory (copy-on-write), "r+" writes them back, "r" is read-only.
+        with open(path, "rb") as f:
+            header = f.read(MAP_HEADER_SIZE)
+            f.seek(0, 2)
+            file_size = f.tell()
+        if len(header) < MAP_HEADER_SIZE or not header.startswith(MAP_MAGIC):
+            raise ValueError(f"{path} is not a binary map")
+        _, version, flags, rows, cols = MAP_HEADER.unpack_from(header)
+        if version != MAP_VERSION:
+            raise ValueError(f"{path}: unsupported map format version {version}")
+        size = rows * cols
+        blocks = 2 if flags & HAS_COSTS else 1
+        if file_size < MAP_HEADER_SIZE + blocks * size:
+            raise ValueError(f"{path} is truncated: expected {rows}x{cols} cells")
+
+        cells = np.memmap(path, dtype=np.uint8, mode=mode, offset=MAP_HEADER_SIZE, shape=(size,))
+        costs = None
+        if flags & HAS_COSTS:
+            costs = np.memmap(path, dtype=np.uint8, mode=mode,
+                              offset=MAP_HEADER_SIZE + size, shape=(size,))
+        return cls(rows, cols, cells, costs)
+
+    def save_binary(self, path):
+        flags = HAS_COSTS if self.costs is not None else 0
+        header = MAP_HEADER.pack(MAP_MAGIC, MAP_VERSION, flags, self.rows, self.cols)
+        # written beside the target and swapped in, so a grid mapped from
+        # `path` itself can be saved back over it
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(header.ljust(MAP_HEADER_SIZE, b"\0"))
+            # tofile streams straight from the array, even a memory-mapped one
+            np.asarray(self.cells, dtype=np.uint8).tofile(f)
+            if self.costs is not None:
+                np.asarray(self.costs, dtype=np.uint8).tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def from_nodes(cls, grid):
+        rows = len(grid)
+        cols = len(grid[0]) if rows else 0
+        cells = np.zeros(rows * cols, dtype=np.uint8)
+        for row in grid:
+            for node in row:
+                if node.is_barrier():
+                    cells[node.row * cols + node.col] = BARRIER
+        return cls(rows, cols, cells)
+
+    # --- ADDRESSING ---
+    def index(self, row, col):
+        return row * self.cols + col
+
+    def pos(self, idx):
+        return divmod(idx, self.cols)
+
+    def as_2d(self):
+        return self.cells.reshape(self.rows, self.cols)
+
+    # --- STATE ---
+    def is_barrier(self, idx):
+        return self.flat[idx] == BARRIER
+
+    def set_barrier(self, idx, barrier=True):
+        self.flat[idx] = BARRIER if barrier else FREE
+        self.version += 1
+
+    def set_cost(self, idx, cost):
+        # costs start out as all ones the first time one is set
+        if cost < 1 or cost > 255:
+            raise ValueError(f"cell cost must be between 1 and 255, got {cost}")
+        if self.costs is None:
+            self.costs = np.ones(self.size, dtype=np.uint8)
+            self.cost_flat = memoryview(self.costs)
+        self.cost_flat[idx] = cost
+        self.version += 1
+
+    def cost(self, idx):
+        return 1 if self.cost_flat is None else self.cost_flat[idx]
+
+    # --- NEIGHBORS ---
+    # Same order as the old Node.update_neighbors: down, up, right, left
+    def neighbors(self, idx):
+        cols = self.cols
+        flat = self.flat
+        row, col = divmod(idx, cols)
+        result = []
+        if row < self.rows - 1 and not flat[idx + cols]:
+            result.append(idx + cols)
+        if row > 0 and not flat[idx - cols]:
+            result.append(idx - cols)
+        if col < cols - 1 and not flat[idx + 1]:
+            result.append(idx + 1)
+        if col > 0 and not flat[idx - 1]:
+            result.append(idx - 1)
+        return result
+
+    def heuristic(self, a, b):
+        r1, c1 = divmod(a, self.cols)
+        r2, c2 = divmod(b, self.cols)
+        return abs(r1 - r2) + abs(c1 - c2)
+
+
+def is_binary_map(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAP_MAGIC)) == MAP_MAGIC
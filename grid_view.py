@@ -0,0 +1,115 @@
+import math
+
+import numpy as np
+import pygame
+
+# --- GRID VIEWPORT ---
+# Draws a big map through a zoomable viewport instead of one object per cell.
+# Cell states live in a (rows, cols) uint8 array; each frame maps the visible
+# window through PALETTE to pixel values, puts it on a surface with one
+# surfarray blit and scales that to the window. Used by the simulation's
+# large-grid mode and by the trace replay (trace_replay.py).
+#
+# handle_view_event gives both the same controls: the mouse wheel zooms
+# around the cursor, the middle button (or the arrow keys) pans and F fits
+# the whole map.
+MAX_ZOOM = 40
+
+# cell states, and their colours (the simulation's)
+EMPTY, WALL, OPEN, CLOSED, PATH, START, END, STOP = range(8)
+PALETTE = np.array([
+    (255, 255, 255),  # empty
+    (0, 0, 0),        # wall
+    (0, 255, 0),      # open
+    (255, 0, 0),      # closed
+    (255, 255, 0),    # path
+    (255, 165, 0),    # start
+    (64, 224, 208),   # end
+    (200, 160, 255),  # numbered stop
+], dtype=np.uint8)
+BACKGROUND = (128, 128, 128)
+
+
+class Viewport:
+    # Rows run along x, as in the simulation's Node grid. (x0, y0) is the
+    # (row, col) position at the window's top-left corner, zoom is pixels
+    # per cell.
+    def __init__(self, win, rows, cols):
+        self.win = win
+        self.rows = rows
+        self.cols = cols
+        self.surface = None
+        self.fit()
+
+    def fit(self):
+        w, h = self.win.get_size()
+        self.zoom = self.min_zoom = min(w / self.rows, h / self.cols)
+        self.x0 = self.y0 = 0.0
+
+    def cell_at(self, pos):
+        row = min(max(int(self.x0 + pos[0] / self.zoom), 0), self.rows - 1)
+        col = min(max(int(self.y0 + pos[1] / self.zoom), 0), self.cols - 1)
+        return row, col
+
+    def zoom_at(self, pos, factor):
+        # keep the cell under the cursor where it is
+        row = self.x0 + pos[0] / self.zoom
+        col = self.y0 + pos[1] / self.zoom
+        self.zoom = min(max(self.zoom * factor, self.min_zoom), MAX_ZOOM)
+        self.x0 = row - pos[0] / self.zoom
+        self.y0 = col - pos[1] / self.zoom
+        self.clamp()
+
+    def pan(self, dx, dy):
+        self.x0 -= dx / self.zoom
+        self.y0 -= dy / self.zoom
+        self.clamp()
+
+    def clamp(self):
+        w, h = self.win.get_size()
+        self.x0 = min(max(self.x0, 0.0), max(self.rows - w / self.zoom, 0.0))
+        self.y0 = min(max(self.y0, 0.0), max(self.cols - h / self.zoom, 0.0))
+
+    def draw(self, state, flip=True):
+        # flip=False leaves the frame unflipped for the caller to draw on
+        w, h = self.win.get_size()
+        r0, c0 = int(self.x0), int(self.y0)
+        r1 = min(self.rows, int(math.ceil(self.x0 + w / self.zoom)) + 1)
+        c1 = min(self.cols, int(math.ceil(self.y0 + h / self.zoom)) + 1)
+        # zoomed out below a pixel per cell, only every step-th cell is drawn
+        step = max(int(1 / self.zoom), 1)
+        view = state[r0:r1:step, c0:c1:step]
+
+        if self.surface is None or self.surface.get_size() != view.shape:
+            self.surface = pygame.Surface(view.shape)
+            # PALETTE as pixel values of this surface: a 2-D blit of mapped
+            # ints is several times faster than blitting an RGB array
+            self.pixels = np.array([self.surface.map_rgb(tuple(c)) for c in PALETTE], dtype=np.uint32)
+        pygame.surfarray.blit_array(self.surface, np.take(self.pixels, view))
+        size = (round(view.shape[0] * step * self.zoom), round(view.shape[1] * step * self.zoom))
+        offset = (round((r0 - self.x0) * self.zoom), round((c0 - self.y0) * self.zoom))
+        self.win.fill(BACKGROUND)
+        self.win.blit(pygame.transform.scale(self.surface, size), offset)
+        if flip:
+            pygame.display.flip()
+
+
+def handle_view_event(view, event):
+    # zoom / pan / fit; True when the event was one of those
+    if event.type == pygame.MOUSEWHEEL:
+        view.zoom_at(pygame.mouse.get_pos(), 1.25 ** event.y)
+        return True
+    if event.type == pygame.MOUSEMOTION and event.buttons[1]:
+        view.pan(*event.rel)
+        return True
+    if event.type == pygame.KEYDOWN:
+        w, h = view.win.get_size()
+        pans = {pygame.K_LEFT: (w / 4, 0), pygame.K_RIGHT: (-w / 4, 0),
+                pygame.K_UP: (0, h / 4), pygame.K_DOWN: (0, -h / 4)}
+        if event.key in pans:
+            view.pan(*pans[event.key])
+            return True
+        if event.key == pygame.K_f:
+            view.fit()
+            return True
+    return False
@@ -0,0 +1,320 @@
+import heapq
+import weakref
+
+import numpy as np
+
+# --- HPA* ---
+# Hierarchical planner for big maps. The grid is cut into square clusters;
+# wherever two neighbouring clusters share a run of free cells along their
+# border, one or two transitions (a cell pair straddling the border) become
+# entrance nodes of the abstract graph. Inside a cluster, entrances are
+# joined by their shortest in-cluster distance. A query connects start and
+# goal to the entrances of their clusters, runs A* on the small abstract
+# graph, and refines only the cluster paths it actually uses.
+#
+# Border transitions are scanned for the whole map up front (vectorised). The
+# in-cluster distance tables are built the first time a cluster is touched
+# and cached. After a wall edit, cell_changed() rescans only the borders
+# that cell lies on and drops the cached tables of the clusters involved.
+# Routes are near-optimal: they pass through the chosen transitions.
+INF = float("inf")
+
+CLUSTER_SIZE = 16
+# free border runs at least this long get a transition at both ends
+ENTRANCE_SPLIT = 6
+
+
+class HPAStar:
+    def __init__(self, grid, cluster_size=CLUSTER_SIZE):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.expansions = 0
+        self.tables_built = 0
+        self.build()
+
+    # --- ABSTRACTION ---
+    def build(self):
+        grid = self.grid
+        cs = self.cluster_size
+        self.cluster_rows = -(-grid.rows // cs)
+        self.cluster_cols = -(-grid.cols // cs)
+        self.transitions = {}
+        self.links = {}
+        self.entrances = {}
+        self.intra = {}
+        self.version = grid.version
+
+        rows, cols = grid.rows, grid.cols
+        ccols = self.cluster_cols
+        # vertical borders: one scan per column line, split per cluster row
+        for cc in range(ccols - 1):
+            a_ids = np.arange(rows) * cols + (cc + 1) * cs - 1
+            for seg, pairs in self._scan_border(a_ids, a_ids + 1).items():
+                self._set_transitions(seg * ccols + cc, seg * ccols + cc + 1, pairs)
+        # horizontal borders
+        for cr in range(self.cluster_rows - 1):
+            a_ids = ((cr + 1) * cs - 1) * cols + np.arange(cols)
+            for seg, pairs in self._scan_border(a_ids, a_ids + cols).items():
+                self._set_transitions(cr * ccols + seg, (cr + 1) * ccols + seg, pairs)
+
+    def _scan_border(self, a_ids, b_ids):
+        # a_ids/b_ids face each other across a border line and start on a
+        # cluster boundary. Returns {segment: [(a, b), ...]} where segment
+        # counts clusters along the line.
+        cs = self.cluster_size
+        cells = self.grid.cells
+        both = (cells[a_ids] == 0) & (cells[b_ids] == 0)
+        pos = np.arange(len(both))
+        first = pos % cs == 0
+        last = (pos % cs == cs - 1) | (pos == len(both) - 1)
+        prev = np.concatenate(([False], both[:-1])) & ~first
+        nxt = np.concatenate((both[1:], [False])) & ~last
+
+        found = {}
+        for s, e in zip(np.flatnonzero(both & ~prev), np.flatnonzero(both & ~nxt)):
+            picks = (s, e) if e - s + 1 >= ENTRANCE_SPLIT else ((s + e) // 2,)
+            found.setdefault(int(s) // cs, []).extend(
+                (int(a_ids[p]), int(b_ids[p])) for p in picks)
+        return found
+
+    def _border_ids(self, ca, cb):
+        # the facing cell ids of neighbouring clusters ca (left/up) and cb
+        cs = self.cluster_size
+        rows, cols = self.grid.rows, self.grid.cols
+        (r, c) = divmod(ca, self.cluster_cols)
+        if cb == ca + 1 and cb % self.cluster_cols:
+            line = np.arange(r * cs, min((r + 1) * cs, rows))
+            a_ids = line * cols + (c + 1) * cs - 1
+            return a_ids, a_ids + 1
+        line = np.arange(c * cs, min((c + 1) * cs, cols))
+        a_ids = ((r + 1) * cs - 1) * cols + line
+        return a_ids, a_ids + cols
+
+    def _set_transitions(self, ca, cb, pairs):
+        # replace the transitions between ca and cb; returns True when the
+        # entrance sets changed
+        old = self.transitions.pop((ca, cb), [])
+        if old == pairs:
+            if pairs:
+                self.transitions[(ca, cb)] = pairs
+            return False
+        links = self.links
+        for a, b in old:
+            for x, y, c in ((a, b, ca), (b, a, cb)):
+                links[x].discard(y)
+                if not links[x]:
+                    del links[x]
+                    self.entrances[c].discard(x)
+        for a, b in pairs:
+            for x, y, c in ((a, b, ca), (b, a, cb)):
+                links.setdefault(x, set()).add(y)
+                self.entrances.setdefault(c, set()).add(x)
+        if pairs:
+            self.transitions[(ca, cb)] = pairs
+        return True
+
+    def cluster_of(self, idx):
+        row, col = divmod(idx, self.grid.cols)
+        cs = self.cluster_size
+        return (row // cs) * self.cluster_cols + col // cs
+
+    def _bounds(self, cluster):
+        cs = self.cluster_size
+        r, c = divmod(cluster, self.cluster_cols)
+        return (r * cs, min((r + 1) * cs, self.grid.rows),
+                c * cs, min((c + 1) * cs, self.grid.cols))
+
+    # --- CLUSTER TABLES ---
+    def _local(self, source, cluster, targets=(), reverse=False):
+        # Dijkstra confined to one cluster; stops once every target is
+        # settled. Returns (dist, parent). With reverse the distances are
+        # towards source (the cost of entering each cell is charged on the
+        # way out of it), which differs from forward on weighted grids.
+        grid = self.grid
+        cols = grid.cols
+        flat = grid.flat
+        cost_flat = grid.cost_flat
+        r0, r1, c0, c1 = self._bounds(cluster)
+
+        dist = {source: 0}
+        parent = {source: -1}
+        settled = set()
+        remaining = set(targets)
+        heap = [(0, source)]
+        while heap:
+            g, current = heapq.heappop(heap)
+            if current in settled:
+                continue
+            settled.add(current)
+            remaining.discard(current)
+            if targets and not remaining:
+                break
+
+            row, col = divmod(current, cols)
+            step = 1
+            if reverse and cost_flat is not None:
+                step = cost_flat[current]
+            for neighbor, ok in (
+                (current + cols, row < r1 - 1),
+                (current - cols, row > r0),
+                (current + 1, col < c1 - 1),
+                (current - 1, col > c0),
+            ):
+                if not ok or flat[neighbor]:
+                    continue
+                if not reverse and cost_flat is not None:
+                    step = cost_flat[neighbor]
+                if g + step < dist.get(neighbor, INF):
+                    dist[neighbor] = g + step
+                    parent[neighbor] = current
+                    heapq.heappush(heap, (g + step, neighbor))
+        return dist, parent
+
+    def _table(self, cluster):
+        # {entrance: {entrance: distance}} for one cluster, built on first use
+        table = self.intra.get(cluster)
+        if table is None:
+            entrances = self.entrances.get(cluster, ())
+            table = {}
+            for e in entrances:
+                dist, _ = self._local(e, cluster, entrances)
+                table[e] = {x: dist[x] for x in entrances if x != e and x in dist}
+            self.intra[cluster] = table
+            self.tables_built += 1
+        return table
+
+    def prepare(self):
+        # build every cluster table now instead of on first use
+        for cluster in range(self.cluster_rows * self.cluster_cols):
+            self._table(cluster)
+
+    # --- EDITS ---
+    def cell_changed(self, idx):
+        # call after the grid cell idx was blocked or cleared
+        if self.grid.version != self.version + 1:
+            # edits we were not told about: start over
+            self.build()
+            return
+        self.version = self.grid.version
+
+        cs = self.cluster_size
+        ccols = self.cluster_cols
+        row, col = divmod(idx, self.grid.cols)
+        cluster = self.cluster_of(idx)
+        self.intra.pop(cluster, None)
+
+        pairs = []
+        if col % cs == cs - 1 and cluster % ccols < ccols - 1:
+            pairs.append((cluster, cluster + 1))
+        if col % cs == 0 and cluster % ccols > 0:
+            pairs.append((cluster - 1, cluster))
+        if row % cs == cs - 1 and cluster // ccols < self.cluster_rows - 1:
+            pairs.append((cluster, cluster + ccols))
+        if row % cs == 0 and cluster >= ccols:
+            pairs.append((cluster - ccols, cluster))
+        for ca, cb in pairs:
+            found = self._scan_border(*self._border_ids(ca, cb))
+            if self._set_transitions(ca, cb, found.get(0, [])):
+                self.intra.pop(ca, None)
+                self.intra.pop(cb, None)
+
+    # --- QUERIES ---
+    def find_path(self, start, goal):
+        # start -> goal as flat ids, [] if no route through the abstraction
+        grid = self.grid
+        flat = grid.flat
+        if flat[start] or flat[goal]:
+            return []
+        if grid.version != self.version:
+            self.build()
+        if start == goal:
+            return [start]
+
+        cols = grid.cols
+        cost_flat = grid.cost_flat
+        goal_row, goal_col = divmod(goal, cols)
+        s_cluster = self.cluster_of(start)
+        g_cluster = self.cluster_of(goal)
+        s_entrances = self.entrances.get(s_cluster, set())
+        g_entrances = self.entrances.get(g_cluster, set())
+
+        start_dist, _ = self._local(start, s_cluster, s_entrances | {goal})
+        goal_dist, _ = self._local(goal, g_cluster, g_entrances, reverse=True)
+
+        def h(idx):
+            row, col = divmod(idx, cols)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        def edges(node):
+            if node == start:
+                for e in s_entrances:
+                    if e in start_dist:
+                        yield e, start_dist[e]
+                if s_cluster == g_cluster and goal in start_dist:
+                    yield goal, start_dist[goal]
+                for other in self.links.get(start, ()):
+                    yield other, 1 if cost_flat is None else cost_flat[other]
+                return
+            for e, d in self._table(self.cluster_of(node)).get(node, {}).items():
+                yield e, d
+            for other in self.links.get(node, ()):
+                yield other, 1 if cost_flat is None else cost_flat[other]
+            if node in goal_dist:
+                yield goal, goal_dist[node]
+
+        g_score = {start: 0}
+        came_from = {start: -1}
+        # ties on f go to the larger g so open ground doesn't flood
+        heap = [(h(start), 0, start)]
+        expansions = 0
+        while heap:
+            _, g, node = heapq.heappop(heap)
+            g = -g
+            if g > g_score[node]:
+                continue
+            expansions += 1
+            if node == goal:
+                break
+            for nxt, d in edges(node):
+                if g + d < g_score.get(nxt, INF):
+                    g_score[nxt] = g + d
+                    came_from[nxt] = node
+                    heapq.heappush(heap, (g + d + h(nxt), -(g + d), nxt))
+        self.expansions = expansions
+        if goal not in came_from:
+            return []
+
+        nodes = [goal]
+        while came_from[nodes[-1]] != -1:
+            nodes.append(came_from[nodes[-1]])
+        nodes.reverse()
+        return self._refine(nodes)
+
+    def _refine(self, nodes):
+        # expand the abstract path into grid cells, one cluster leg at a time
+        path = [nodes[0]]
+        for a, b in zip(nodes, nodes[1:]):
+            if b in self.links.get(a, ()):
+                path.append(b)
+                continue
+            _, parent = self._local(a, self.cluster_of(a), (b,))
+            leg = [b]
+            while parent[leg[-1]] != -1:
+                leg.append(parent[leg[-1]])
+            path.extend(reversed(leg[:-1]))
+        return path
+
+
+_planners = weakref.WeakKeyDictionary()
+
+def planner_for(grid, cluster_size=CLUSTER_SIZE):
+    # one cached abstraction per grid
+    planner = _planners.get(grid)
+    if planner is None or planner.cluster_size != cluster_size:
+        planner = HPAStar(grid, cluster_size)
+        _planners[grid] = planner
+    return planner
+
+def cached_planner(grid):
+    # the grid's planner if planner_for() has built one, else None
+    return _planners.get(grid)
@@ -0,0 +1,122 @@
+import heapq
+
+# --- D* LITE ---
+# Incremental planner for one start/goal pair on an ArrayGrid. It searches
+# backwards from the goal and keeps its g/rhs values between queries. When a
+# cell is blocked or cleared, only that cell and its four neighbours are
+# re-evaluated, and the next replan() repairs just the part of the search the
+# edit affected.
+INF = float("inf")
+
+
+class DStarLite:
+    def __init__(self, grid, start, goal):
+        self.grid = grid
+        self.start = start
+        self.goal = goal
+
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.open_heap = []
+        self.open_keys = {}
+        self.expansions = 0
+
+        self._push(goal)
+
+    # --- HELPERS ---
+    def _h(self, idx):
+        r1, c1 = divmod(idx, self.grid.cols)
+        r2, c2 = divmod(self.start, self.grid.cols)
+        return abs(r1 - r2) + abs(c1 - c2)
+
+    def _key(self, idx):
+        best = min(self.g.get(idx, INF), self.rhs.get(idx, INF))
+        return (best + self._h(idx), best)
+
+    def _push(self, idx):
+        key = self._key(idx)
+        self.open_keys[idx] = key
+        heapq.heappush(self.open_heap, (key, idx))
+
+    def _adjacent(self, idx):
+        # all in-bounds neighbours, free or not; edit handling needs both
+        grid = self.grid
+        cols = grid.cols
+        row, col = divmod(idx, cols)
+        if row < grid.rows - 1:
+            yield idx + cols
+        if row > 0:
+            yield idx - cols
+        if col < cols - 1:
+            yield idx + 1
+        if col > 0:
+            yield idx - 1
+
+    def _update(self, idx):
+        flat = self.grid.flat
+        if idx != self.goal:
+            best = INF
+            if not flat[idx]:
+                g = self.g
+                for nb in self._adjacent(idx):
+                    if not flat[nb]:
+                        cost = g.get(nb, INF) + 1
+                        if cost < best:
+                            best = cost
+            self.rhs[idx] = best
+
+        # stale heap entries are dropped lazily via open_keys
+        self.open_keys.pop(idx, None)
+        if self.g.get(idx, INF) != self.rhs.get(idx, INF):
+            self._push(idx)
+
+    def _top_key(self):
+        heap = self.open_heap
+        while heap and self.open_keys.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else (INF, INF)
+
+    # --- PLANNING ---
+    def replan(self):
+        g, rhs = self.g, self.rhs
+        start = self.start
+        while (self._top_key() < self._key(start)
+               or rhs.get(start, INF) != g.get(start, INF)):
+            k_old, u = heapq.heappop(self.open_heap)
+            del self.open_keys[u]
+            self.expansions += 1
+
+            k_new = self._key(u)
+            if k_old < k_new:
+                self._push(u)
+            elif g.get(u, INF) > rhs.get(u, INF):
+                g[u] = rhs[u]
+                for nb in self._adjacent(u):
+                    self._update(nb)
+            else:
+                g[u] = INF
+                self._update(u)
+                for nb in self._adjacent(u):
+                    self._update(nb)
+        return g.get(start, INF)
+
+    def cell_changed(self, idx):
+        # call after the grid cell idx was blocked or cleared
+        self._update(idx)
+        for nb in self._adjacent(idx):
+            self._update(nb)
+
+    def path(self):
+        # follow the cheapest successor from start to goal after replan();
+        # [] if the goal is unreachable
+        if self.g.get(self.start, INF) == INF:
+            return []
+        flat = self.grid.flat
+        g = self.g
+        path = [self.start]
+        current = self.start
+        while current != self.goal:
+            current = min((nb for nb in self._adjacent(current) if not flat[nb]),
+                          key=lambda nb: g.get(nb, INF))
+            path.append(current)
+        return path
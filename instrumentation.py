@@ -0,0 +1,106 @@
+import time
+import tracemalloc
+
+# --- SEARCH PROBE ---
+# Optional instrumentation for one search at a time. Pass probe=SearchProbe()
+# to SearchCore.search (or run_search / A_star_algorithm) and it counts
+# expansions, heap pushes, stale pops, re-expansions of already expanded
+# cells, the peak open-set size and per-phase wall time. on_expand and
+# on_push are called with each cell id, so a probe can also drive a display
+# in place of the on_close / on_open callbacks. With trace_memory the peak
+# Python allocation during the search is recorded too (tracemalloc, which
+# slows the search down several times; keep it out of timing runs).
+#
+# Without a probe the searches pay one "is None" test per expansion.
+PHASES = ("setup", "search", "reconstruct")
+
+
+class SearchProbe:
+    def __init__(self, on_expand=None, on_push=None, trace_memory=False):
+        self.on_expand = on_expand
+        self.on_push = on_push
+        self.trace_memory = trace_memory
+        self.reset()
+
+    def reset(self):
+        self.expansions = 0
+        self.pushes = 0
+        self.stale_pops = 0
+        self.reopenings = 0
+        self.peak_open = 0
+        self.peak_memory = 0
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self._expanded = set()
+        self._phase = None
+        self._since = 0.0
+        self._tracing = False
+
+    # --- PHASES ---
+    # begin() opens "setup"; the searches switch to "search" once their
+    # arrays and open list are ready; the caller switches to "reconstruct"
+    # before building the path and calls end() after it.
+    def begin(self):
+        self.reset()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        self.phase("setup")
+
+    def phase(self, name):
+        now = time.perf_counter()
+        if self._phase is not None:
+            self.phases[self._phase] += (now - self._since) * 1000
+        self._phase = name
+        self._since = now
+
+    def end(self):
+        self.phase(None)
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.peak_memory = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+            if self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+
+    # --- EVENTS ---
+    def expanded(self, cell, open_size, side=0):
+        # open_size is the open list after popping cell; side tells the two
+        # halves of a bidirectional search apart
+        self.expansions += 1
+        if open_size + 1 > self.peak_open:
+            self.peak_open = open_size + 1
+        key = cell if not side else (side, cell)
+        if key in self._expanded:
+            self.reopenings += 1
+        else:
+            self._expanded.add(key)
+        if self.on_expand is not None:
+            self.on_expand(cell)
+
+    def opener(self, on_open=None):
+        # an on_open callback that counts pushes, then calls on_open and
+        # on_push
+        on_push = self.on_push
+
+        def pushed(cell):
+            self.pushes += 1
+            if on_open is not None:
+                on_open(cell)
+            if on_push is not None:
+                on_push(cell)
+        return pushed
+
+    def report(self):
+        # plain dict (picklable, JSON-able) of everything collected
+        return {
+            'expansions': self.expansions,
+            'pushes': self.pushes,
+            'stale_pops': self.stale_pops,
+            'reopenings': self.reopenings,
+            'peak_open': self.peak_open,
+            'peak_memory_kb': self.peak_memory / 1024,
+            'setup_ms': self.phases['setup'],
+            'search_ms': self.phases['search'],
+            'reconstruct_ms': self.phases['reconstruct'],
+        }
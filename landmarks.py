@@ -0,0 +1,206 @@
+import hashlib
+import heapq
+
+import numpy as np
+
+# --- ALT LANDMARKS ---
+# A handful of landmark cells with exact distances to every cell. For any
+# landmark L the triangle inequality gives |d(L, goal) - d(L, v)| <= d(v, goal),
+# so the best bound over all landmarks is an admissible heuristic. On walled
+# layouts (rivers, compounds) it is much tighter than Manhattan distance.
+# Landmarks are picked farthest-first so they sit at the edges of the map.
+# With per-cell costs the distances differ by direction, and tables to each
+# landmark are kept as well. Tables are stored as uint16 when every distance
+# fits (uint32 otherwise), with the dtype's max marking unreachable cells, and
+# can be saved beside the map as <map>.alt.npz.
+UNREACHED = 0xFFFFFFFF
+DEFAULT_LANDMARKS = 8
+
+
+def distance_table(grid, source, reverse=False):
+    # exact distance from source to every cell (to source with reverse), from
+    # distance_fields' vectorised BFS or scipy's Dijkstra; a heap Dijkstra
+    # here covers grids with costs when scipy is missing
+    from distance_fields import cell_field, have_scipy
+    if grid.cost_flat is None or have_scipy():
+        return cell_field(grid, [source], reverse)[0]
+
+    rows, cols = grid.rows, grid.cols
+    flat = grid.flat
+    cost_flat = grid.cost_flat
+    dist = np.full(grid.size, UNREACHED, dtype=np.uint32)
+    out = memoryview(dist)
+    out[source] = 0
+
+    heap = [(0, source)]
+    while heap:
+        g, current = heapq.heappop(heap)
+        if g > out[current]:
+            continue
+        row, col = divmod(current, cols)
+        for neighbor, ok in (
+            (current + cols, row < rows - 1),
+            (current - cols, row > 0),
+            (current + 1, col < cols - 1),
+            (current - 1, col > 0),
+        ):
+            if not ok or flat[neighbor]:
+                continue
+            # reverse: stepping back from current to neighbor costs what the
+            # forward move neighbor -> current does
+            d = g + (cost_flat[current] if reverse else cost_flat[neighbor])
+            if d < out[neighbor]:
+                out[neighbor] = d
+                heapq.heappush(heap, (d, neighbor))
+    return dist
+
+def fingerprint(grid):
+    digest = hashlib.sha1(grid.cells.tobytes())
+    if grid.costs is not None:
+        digest.update(grid.costs.tobytes())
+    return f"{grid.rows}x{grid.cols}:{digest.hexdigest()}"
+
+
+def compact(tables):
+    # shrink a set of uint32 tables to uint16 when every distance fits;
+    # tables that are already compact (loaded from disk) pass through
+    tables = list(tables)
+    if any(t.dtype != np.uint32 for t in tables):
+        return tables
+    finite = [t[t != UNREACHED] for t in tables]
+    if all(len(f) == 0 or f.max() < 0xFFFF for f in finite):
+        return [np.where(t == UNREACHED, 0xFFFF, t).astype(np.uint16) for t in tables]
+    return [t.astype(np.uint32) for t in tables]
+
+
+class Landmarks:
+    def __init__(self, grid, cells, from_tables, to_tables=None):
+        self.grid = grid
+        self.cells = list(cells)
+        self.from_tables = compact(from_tables)
+        # only weighted grids need separate tables towards the landmarks
+        self.to_tables = None if to_tables is None else compact(to_tables)
+        self.version = grid.version
+        self._goal = None
+        self._goal_row = self._goal_col = 0
+        self._terms = []
+        # bounds worked out for the current goal, stamped like SearchCore's
+        # scores so a new target() doesn't have to clear them
+        self._h = None
+        self._stamp = None
+        self._generation = 0
+
+    # --- BUILDING ---
+    @classmethod
+    def build(cls, grid, k=DEFAULT_LANDMARKS, seed=0):
+        free = np.flatnonzero(grid.cells == 0)
+        if len(free) == 0:
+            return cls(grid, [], [])
+        rng = np.random.default_rng(seed)
+        seed_cell = int(free[rng.integers(len(free))])
+
+        # farthest-first: each new landmark is the reachable cell farthest
+        # from the ones already picked (the first from a random free cell)
+        nearest = distance_table(grid, seed_cell).astype(np.int64)
+        cells, tables = [], []
+        for _ in range(k):
+            reach = np.where(nearest == UNREACHED, -1, nearest)
+            cell = int(np.argmax(reach))
+            if reach[cell] <= 0 and cells:
+                break
+            table = distance_table(grid, cell)
+            cells.append(cell)
+            tables.append(table)
+            nearest = np.minimum(nearest, table)
+
+        to_tables = None
+        if grid.costs is not None:
+            to_tables = [distance_table(grid, cell, reverse=True) for cell in cells]
+        return cls(grid, cells, tables, to_tables)
+
+    # --- PERSISTENCE ---
+    @staticmethod
+    def path_for(map_path):
+        return map_path + ".alt.npz"
+
+    def save(self, path):
+        arrays = {'cells': np.array(self.cells, dtype=np.int64),
+                  'from_tables': np.array(self.from_tables),
+                  'fingerprint': np.array(fingerprint(self.grid))}
+        if self.to_tables is not None:
+            arrays['to_tables'] = np.array(self.to_tables)
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path, grid):
+        # None when the file is missing or was built for a different map
+        try:
+            data = np.load(path)
+        except FileNotFoundError:
+            return None
+        with data:
+            if str(data['fingerprint']) != fingerprint(grid):
+                return None
+            to_tables = list(data['to_tables']) if 'to_tables' in data.files else None
+            return cls(grid, data['cells'].tolist(), list(data['from_tables']), to_tables)
+
+    # --- HEURISTIC ---
+    def target(self, goal):
+        # Sets the goal for bound(). Only the goal's entry of each table is
+        # read here; a cell's bound is worked out the first time the search
+        # asks for it and kept until the next target(), so a query costs the
+        # cells it touches, not the map.
+        # d(L, goal) - d(L, v) <= d(v, goal) always holds; the reverse
+        # difference needs d(v, L) - d(goal, L), which is the from-table
+        # itself only when moves cost the same both ways.
+        if self.to_tables is None:
+            terms = [(t, 0) for t in self.from_tables]
+        else:
+            terms = [(t, 1) for t in self.from_tables] + [(t, -1) for t in self.to_tables]
+        self._goal = goal
+        self._goal_row, self._goal_col = divmod(goal, self.grid.cols)
+        # (table, d(L, goal) or d(goal, L), sign, the table's "unreachable")
+        self._terms = [(memoryview(table), int(table[goal]), sign, int(np.iinfo(table.dtype).max))
+                       for table, sign in terms]
+        if self._stamp is None:
+            self._h = memoryview(np.empty(self.grid.size, dtype=np.uint32))
+            self._stamp = memoryview(np.zeros(self.grid.size, dtype=np.int32))
+        self._generation += 1
+
+    def bound(self, idx):
+        # lower bound on the distance from idx to the goal given to target(),
+        # never below Manhattan distance; UNREACHED when a landmark shows the
+        # two are in different components
+        if self._stamp[idx] == self._generation:
+            return self._h[idx]
+        row, col = divmod(idx, self.grid.cols)
+        h = abs(row - self._goal_row) + abs(col - self._goal_col)
+        for table, at_goal, sign, none in self._terms:
+            at_cell = table[idx]
+            if at_cell == none or at_goal == none:
+                if at_cell != at_goal:
+                    h = UNREACHED
+                    break
+                continue
+            d = at_goal - at_cell if sign >= 0 else at_cell - at_goal
+            if d < 0 and sign == 0:
+                d = -d
+            if d > h:
+                h = d
+        self._h[idx] = h
+        self._stamp[idx] = self._generation
+        return h
+
+    def is_stale(self):
+        return self.version != self.grid.version
+
+
+def landmarks_for_map(map_path, grid, k=DEFAULT_LANDMARKS):
+    # load <map>.alt.npz if it matches the map, otherwise build and save it
+    path = Landmarks.path_for(map_path)
+    landmarks = Landmarks.load(path, grid)
+    if landmarks is None:
+        landmarks = Landmarks.build(grid, k)
+        landmarks.save(path)
+    return landmarks
@@ -0,0 +1,184 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from grid_engine import ArrayGrid
+from search_core import core_for
+
+# Multi-stop planning: a stop-to-stop distance matrix from one-to-many
+# searches (one per stop, fanned out over a process pool), a nearest
+# neighbour + 2-opt/Or-opt ordering, and the route stitched from the paths
+# the matrix searches already found.
+
+UNREACHABLE = float("inf")
+
+
+# --- DISTANCE MATRIX ---
+_worker_grid = None
+
+def _init_worker(cells, rows, cols, costs):
+    # each worker gets the occupancy (and cost) arrays once, not once per task
+    global _worker_grid
+    _worker_grid = ArrayGrid(rows, cols, cells, costs)
+
+def _row_from(grid, source, targets):
+    core = core_for(grid)
+    costs = core.search_many(source, targets)
+    return {t: (cost, core.path(t)) for t, cost in costs.items()}
+
+def _row_worker(source, targets):
+    return _row_from(_worker_grid, source, targets)
+
+def distance_matrix(grid, stops, processes=None):
+    # stops are flat ids. Returns (matrix, paths): matrix[i][j] is the leg
+    # cost (UNREACHABLE if none) and paths[i][j] the leg as flat ids.
+    # Unit-cost grid legs are symmetric, so stop i only searches towards the
+    # stops after it and the other half of the matrix is filled by reversal.
+    # With per-cell costs a leg costs differently each way, so every stop
+    # searches towards all the others.
+    n = len(stops)
+    symmetric = grid.costs is None
+    if symmetric:
+        jobs = [(stops[i], set(stops[i + 1:])) for i in range(n - 1)]
+    else:
+        jobs = [(stops[i], set(stops)) for i in range(n)]
+    if processes is None:
+        processes = min(os.cpu_count() or 1, len(jobs))
+
+    if processes <= 1 or len(jobs) <= 1:
+        rows = [_row_from(grid, s, targets) for s, targets in jobs]
+    else:
+        with ProcessPoolExecutor(processes, initializer=_init_worker,
+                                 initargs=(grid.cells, grid.rows, grid.cols, grid.costs)) as pool:
+            futures = [pool.submit(_row_worker, s, targets) for s, targets in jobs]
+            rows = [f.result() for f in futures]
+
+    matrix = [[UNREACHABLE] * n for _ in range(n)]
+    paths = [[[] for _ in range(n)] for _ in range(n)]
+    for i in range(n):
+        matrix[i][i], paths[i][i] = 0, [stops[i]]
+    for i, row in enumerate(rows):
+        for j in range(i + 1 if symmetric else 0, n):
+            if stops[j] in row and i != j:
+                cost, path = row[stops[j]]
+                matrix[i][j], paths[i][j] = cost, path
+                if symmetric:
+                    matrix[j][i], paths[j][i] = cost, path[::-1]
+    return matrix, paths
+
+
+# --- STOP ORDERING ---
+def route_cost(matrix, order):
+    return sum(matrix[order[k]][order[k + 1]] for k in range(len(order) - 1))
+
+def nearest_neighbour(matrix, first, fixed_end=None):
+    n = len(matrix)
+    order = [first]
+    left = set(range(n)) - {first}
+    if fixed_end is not None:
+        left.discard(fixed_end)
+    while left:
+        last = order[-1]
+        nxt = min(left, key=lambda j: (matrix[last][j], j))
+        order.append(nxt)
+        left.remove(nxt)
+    if fixed_end is not None and fixed_end != first:
+        order.append(fixed_end)
+    return order
+
+def two_opt(matrix, order, lo, hi):
+    # reverse order[i..j] while that shortens the route; only positions in
+    # lo..hi may move. On a symmetric matrix a reversal keeps the inner leg
+    # costs, so only the two boundary legs are compared; otherwise the whole
+    # candidate route is costed.
+    d = matrix
+    n = len(matrix)
+    symmetric = all(d[i][j] == d[j][i] for i in range(n) for j in range(i))
+    last = len(order) - 1
+    improved = True
+    while improved:
+        improved = False
+        for i in range(lo, hi):
+            for j in range(i + 1, hi + 1):
+                if symmetric:
+                    before = after = 0
+                    if i > 0:
+                        before += d[order[i - 1]][order[i]]
+                        after += d[order[i - 1]][order[j]]
+                    if j < last:
+                        before += d[order[j]][order[j + 1]]
+                        after += d[order[i]][order[j + 1]]
+                    better = after < before
+                else:
+                    candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                    better = route_cost(d, candidate) < route_cost(d, order)
+                if better:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    improved = True
+    return order
+
+def or_opt(matrix, order, lo, hi, max_segment=3):
+    # move runs of 1..max_segment stops (optionally reversed) elsewhere
+    improved = True
+    best = route_cost(matrix, order)
+    while improved:
+        improved = False
+        for length in range(1, max_segment + 1):
+            for i in range(lo, hi - length + 2):
+                segment = order[i:i + length]
+                rest = order[:i] + order[i + length:]
+                for k in range(lo, min(hi - length + 1, len(rest)) + 1):
+                    if k == i:
+                        continue
+                    for piece in (segment, segment[::-1]):
+                        candidate = rest[:k] + piece + rest[k:]
+                        cost = route_cost(matrix, candidate)
+                        if cost < best:
+                            order, best, improved = candidate, cost, True
+                            break
+                    if improved:
+                        break
+                if improved:
+                    break
+            if improved:
+                break
+    return order
+
+def order_stops(matrix, fix_start=True, fix_end=True):
+    # Indices into the matrix in visiting order. With fix_start / fix_end the
+    # first / last stop stay where they are.
+    n = len(matrix)
+    if n <= 2:
+        return list(range(n))
+
+    end = n - 1 if fix_end else None
+    firsts = [0] if fix_start else [i for i in range(n) if i != end]
+    order = min((nearest_neighbour(matrix, f, end) for f in firsts),
+                key=lambda o: route_cost(matrix, o))
+
+    lo = 1 if fix_start else 0
+    hi = n - 2 if fix_end else n - 1
+    while True:
+        cost = route_cost(matrix, order)
+        order = two_opt(matrix, order, lo, hi)
+        order = or_opt(matrix, order, lo, hi)
+        if route_cost(matrix, order) >= cost:
+            return order
+
+
+# --- PLANNER ---
+def plan_multi_stop(grid, stops, fix_start=True, fix_end=True, processes=None):
+    # stops are (row, col). Returns (order, route, length): order indexes into
+    # stops, route is the stitched (row, col) path (empty if a leg is
+    # unreachable) and length its total cost.
+    ids = [grid.index(*s) for s in stops]
+    matrix, paths = distance_matrix(grid, ids, processes)
+    order = order_stops(matrix, fix_start, fix_end)
+
+    length = route_cost(matrix, order)
+    if length == UNREACHABLE:
+        return order, [], UNREACHABLE
+
+    route = [ids[order[0]]]
+    for a, b in zip(order, order[1:]):
+        route.extend(paths[a][b][1:])
+    return order, [grid.pos(idx) for idx in route], length
@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+
+# --- RESULT STORE ---
+# Append-only benchmark results: one JSON record per line, keyed by
+# (code version, size, seed, algorithm). A record is written and flushed as
+# soon as its cell finishes, so an interrupted sweep loses at most the cell
+# in flight, and rerunning it skips every cell already stored for the same
+# code version. A line cut off by a crash is ignored when reading.
+#
+# The code version is a hash of the sources the timings depend on, so any
+# edit to the search code starts a fresh set of results (older ones stay in
+# the file and can still be read by version).
+DEFAULT_STORE = "bench_store.jsonl"
+CODE_FILES = ("grid_engine.py", "search_core.py", "landmarks.py", "connectivity.py",
+              "benchmark.py", "bench_suite.py", "instrumentation.py")
+
+
+def code_version(files=CODE_FILES):
+    here = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha1()
+    for name in files:
+        path = os.path.join(here, name)
+        if os.path.exists(path):
+            digest.update(name.encode())
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def record_key(record):
+    return (record['version'], record['size'], record['seed'], record['algorithm'])
+
+
+class ResultStore:
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+        self.records = []
+        self.keys = set()
+        self.load()
+
+    def load(self):
+        self.records = []
+        self.keys = set()
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a partial line from an interrupted write
+                self.records.append(record)
+                self.keys.add(record_key(record))
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def add(self, record):
+        # record needs 'version', 'size', 'seed' and 'algorithm'
+        line = json.dumps(record, separators=(',', ':'))
+        with open(self.path, 'a') as f:
+            # start on a fresh line if the file ends in a partial record
+            if f.tell() and not self._ends_with_newline():
+                f.write('\n')
+            f.write(line + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.records.append(record)
+        self.keys.add(record_key(record))
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def runs(self, version=None):
+        # records for one code version (the newest one stored by default)
+        if version is None:
+            version = self.latest_version()
+        return [r for r in self.records if r['version'] == version]
+
+    def latest_version(self):
+        return self.records[-1]['version'] if self.records else None
+
+    def versions(self):
+        return list(dict.fromkeys(r['version'] for r in self.records))
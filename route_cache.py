@@ -0,0 +1,123 @@
+from collections import OrderedDict
+
+# --- ROUTE CACHE ---
+# LRU cache of optimal routes on one grid, keyed by (start, goal) flat ids and
+# valid for the grid version it has been told about. Any stretch of a cached
+# optimal route is itself optimal, so a query whose start and goal both lie
+# on a cached route (in that order, or either order on unit-cost grids) is
+# answered by slicing it. The memory cap counts the cells held by all routes.
+#
+# After an edit, cell_changed(idx) drops only the routes it can affect: those
+# passing through idx and, when idx became passable (or cheaper), those a
+# detour through idx could beat by Manhattan distance. Edits the cache wasn't
+# told about are caught by the version check, which empties it.
+DEFAULT_MAX_CELLS = 1_000_000
+
+
+class RouteCache:
+    def __init__(self, grid, max_cells=DEFAULT_MAX_CELLS):
+        self.grid = grid
+        self.max_cells = max_cells
+        self.routes = OrderedDict()
+        # cell -> {route key: position of the cell on that route}
+        self.through = {}
+        self.cells_held = 0
+        self.version = grid.version
+        self.hits = 0
+        self.subpath_hits = 0
+        self.misses = 0
+
+    # --- LOOKUP ---
+    def get(self, start, goal):
+        # (path, cost) as flat ids, or None when no cached route covers it
+        self._check_version()
+        key = (start, goal)
+        entry = self.routes.get(key)
+        if entry is not None:
+            self.routes.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        at_start = self.through.get(start)
+        at_goal = self.through.get(goal)
+        if at_start and at_goal:
+            symmetric = self.grid.costs is None
+            if len(at_start) > len(at_goal):
+                pairs = ((k, at_start.get(k), j) for k, j in at_goal.items())
+            else:
+                pairs = ((k, i, at_goal.get(k)) for k, i in at_start.items())
+            for k, i, j in pairs:
+                if i is None or j is None or (j < i and not symmetric):
+                    continue
+                path = self.routes[k][0]
+                sub = path[i:j + 1] if i <= j else path[j:i + 1][::-1]
+                self.routes.move_to_end(k)
+                self.subpath_hits += 1
+                return sub, self._cost(sub)
+
+        self.misses += 1
+        return None
+
+    def put(self, start, goal, path, cost):
+        self._check_version()
+        key = (start, goal)
+        if key in self.routes:
+            self._drop(key)
+        if not path or len(path) > self.max_cells:
+            return
+        self.routes[key] = (path, cost)
+        for pos, idx in enumerate(path):
+            self.through.setdefault(idx, {})[key] = pos
+        self.cells_held += len(path)
+        while self.cells_held > self.max_cells:
+            self._drop(next(iter(self.routes)))
+
+    def _cost(self, path):
+        cost_flat = self.grid.cost_flat
+        if cost_flat is None:
+            return len(path) - 1
+        return sum(cost_flat[idx] for idx in path[1:])
+
+    # --- INVALIDATION ---
+    def cell_changed(self, idx):
+        # call after the grid cell idx was blocked, cleared or re-costed
+        grid = self.grid
+        if grid.version != self.version + 1:
+            self.clear()
+            return
+        self.version = grid.version
+
+        for key in list(self.through.get(idx, ())):
+            self._drop(key)
+        if grid.is_barrier(idx):
+            return
+
+        cols = grid.cols
+        row, col = divmod(idx, cols)
+        for key, (_, cost) in list(self.routes.items()):
+            s_row, s_col = divmod(key[0], cols)
+            g_row, g_col = divmod(key[1], cols)
+            detour = (abs(s_row - row) + abs(s_col - col)
+                      + abs(g_row - row) + abs(g_col - col))
+            if detour < cost:
+                self._drop(key)
+
+    def clear(self):
+        self.routes.clear()
+        self.through.clear()
+        self.cells_held = 0
+        self.version = self.grid.version
+
+    def _check_version(self):
+        if self.grid.version != self.version:
+            self.clear()
+
+    def _drop(self, key):
+        path, _ = self.routes.pop(key)
+        through = self.through
+        for idx in path:
+            on = through[idx]
+            del on[key]
+            if not on:
+                del through[idx]
+        self.cells_held -= len(path)
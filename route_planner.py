@@ -0,0 +1,346 @@
+import sys
+import weakref
+
+from connectivity import cached_components
+from grid_engine import ArrayGrid, is_binary_map
+from route_cache import RouteCache
+from search_core import core_for
+
+# Headless planning API shared by the CLI below, the simulation and any
+# worker that only needs routes. Nothing here imports pygame; the visual mode
+# loads the simulation script lazily.
+
+SIMULATION_SCRIPT = "Rescue 1122 Route Planner w Simulation.py"
+
+
+# --- GRID BUILDING ---
+def make_grid(rows, cols=None):
+    return ArrayGrid(rows, cols)
+
+def load_map(path):
+    # binary maps (grid_engine's format) are memory-mapped; anything else is
+    # read as a text map
+    if is_binary_map(path):
+        return ArrayGrid.open_binary(path)
+    with open(path) as f:
+        return ArrayGrid.from_text(f)
+
+def heuristic(p1, p2):
+    x1, y1 = p1
+    x2, y2 = p2
+    return abs(x1 - x2) + abs(y1 - y2)
+
+
+# --- SEARCH ---
+def reconstruct_path(grid, core, end):
+    # (row, col) cells from the query's start to `end`, both included
+    return [grid.pos(idx) for idx in core.path(end)]
+
+def open_ends(grid, start_id, end_id):
+    # False when no route can exist: either end is a barrier, or the grid's
+    # component index (if it has one) puts them in different components
+    if grid.is_barrier(start_id) or grid.is_barrier(end_id):
+        return False
+    components = cached_components(grid)
+    return components is None or components.reachable(start_id, end_id)
+
+def A_star_algorithm(grid, start, end, on_open=None, on_close=None, algo_type="A_Star", probe=None):
+    # start/end are (row, col); callbacks also receive (row, col). A probe
+    # (instrumentation.SearchProbe) is filled in for this query; its own
+    # callbacks get flat cell ids. Returns the path as a list, empty when
+    # the end is unreachable.
+    if probe is not None:
+        probe.begin()
+    start_id = grid.index(*start)
+    end_id = grid.index(*end)
+    # barrier ends, and with a component index walled-off ones, are rejected
+    # without a search
+    if not open_ends(grid, start_id, end_id):
+        if probe is not None:
+            probe.end()
+        return []
+
+    if on_open is not None:
+        report_open = on_open
+        on_open = lambda idx: report_open(grid.pos(idx))
+    if on_close is not None:
+        report_close = on_close
+        on_close = lambda idx: report_close(grid.pos(idx))
+
+    core = core_for(grid)
+    found, _, _ = core.search(start_id, end_id, algo_type, on_open, on_close, probe)
+    if probe is not None:
+        probe.phase("reconstruct")
+    path = reconstruct_path(grid, core, end_id) if found else []
+    if probe is not None:
+        probe.end()
+    return path
+
+_caches = weakref.WeakKeyDictionary()
+
+# searches that return optimal routes; only these are cached, since the
+# cache hands out slices of a route as optimal subpaths
+OPTIMAL_SEARCHES = ("A_Star", "Dijkstra", "ALT", "JPS", "Bi_A_Star", "Bi_Dijkstra", "ARA_Star",
+                    "Dial_A_Star", "Dial_Dijkstra")
+
+def route_cache_for(grid):
+    cache = _caches.get(grid)
+    if cache is None:
+        cache = RouteCache(grid)
+        _caches[grid] = cache
+    return cache
+
+def cached_route(grid, start, end, algo_type="A_Star"):
+    # A_star_algorithm without callbacks, answered from the grid's route
+    # cache when a cached route covers start -> end. Non-optimal searches
+    # (Greedy, Dial_Greedy) go straight to the search and are never stored.
+    if algo_type not in OPTIMAL_SEARCHES:
+        return A_star_algorithm(grid, start, end, algo_type=algo_type)
+    start_id = grid.index(*start)
+    end_id = grid.index(*end)
+    cache = route_cache_for(grid)
+    hit = cache.get(start_id, end_id)
+    if hit is not None:
+        return [grid.pos(idx) for idx in hit[0]]
+
+    path = A_star_algorithm(grid, start, end, algo_type=algo_type)
+    if path:
+        cache.put(start_id, end_id, [grid.index(*p) for p in path],
+                  core_for(grid).cost(end_id))
+    return path
+
+def anytime_route(grid, start, end, budget_ms):
+    # (path, bound, timed_out): the best route ARA* finds within budget_ms,
+    # with its proven bound (cost is at most bound x optimal). No route comes
+    # back as ([], None, False) when the end is unreachable and as
+    # ([], None, True) when the budget ran out first.
+    start_id = grid.index(*start)
+    end_id = grid.index(*end)
+    if not open_ends(grid, start_id, end_id):
+        return [], None, False
+    core = core_for(grid)
+    solutions, _ = core.anytime_search(start_id, end_id, time_budget_ms=budget_ms)
+    if not solutions:
+        return [], None, core.last_out_of_budget
+    path, _, bound = solutions[-1]
+    return [grid.pos(idx) for idx in path], bound, False
+
+def nearest_unit(grid, units, incident, algo_type="A_Star"):
+    # one multi-source search from every unit (row, col) to the incident
+    # instead of one search per unit. Returns (position in units, path), or
+    # (-1, []) when no unit can reach it.
+    goal = grid.index(*incident)
+    components = cached_components(grid)
+    ids = [grid.index(*u) for u in units]
+    candidates = ids
+    if components is not None:
+        candidates = [idx for idx in ids if components.reachable(idx, goal)]
+    core = core_for(grid)
+    found, _, _, source = core.multi_source_search(candidates, goal, algo_type)
+    if not found:
+        return -1, []
+    return ids.index(source), reconstruct_path(grid, core, goal)
+
+def station_regions(grid, stations):
+    # every cell's nearest station: (dist, owner) as rows x cols arrays,
+    # owner being the position in stations (-1 and UNREACHED where no
+    # station can get to the cell)
+    dist, owner = core_for(grid).nearest_sources([grid.index(*s) for s in stations])
+    return dist.reshape(grid.rows, grid.cols), owner.reshape(grid.rows, grid.cols)
+
+def cell_changed(grid, idx):
+    # tell the grid's route cache, HPA* planner and component index (those it
+    # has) about a wall edit so each updates just what the edit affects
+    from hierarchical import cached_planner
+    cache = _caches.get(grid)
+    if cache is not None:
+        cache.cell_changed(idx)
+    planner = cached_planner(grid)
+    if planner is not None:
+        planner.cell_changed(idx)
+    components = cached_components(grid)
+    if components is not None:
+        components.cell_changed(idx)
+
+def hierarchical_path(grid, start, end):
+    # HPA* on the grid's cached cluster abstraction: much less work per query
+    # on big maps, routes within a few percent of optimal
+    from hierarchical import planner_for
+    path = planner_for(grid).find_path(grid.index(*start), grid.index(*end))
+    return [grid.pos(idx) for idx in path]
+
+def use_landmarks(grid, map_path):
+    # ALT heuristic for this map's queries, from <map>.alt.npz when it is
+    # up to date (built and saved otherwise)
+    from landmarks import landmarks_for_map
+    core_for(grid).landmarks = landmarks_for_map(map_path, grid)
+
+def plan_route(grid, stops, hierarchical=False, algo_type="A_Star"):
+    # Chains one A* leg per consecutive pair of stops, in the given order.
+    # A leg that cannot be reached comes back as an empty list.
+    if hierarchical:
+        return [hierarchical_path(grid, stops[i], stops[i + 1])
+                for i in range(len(stops) - 1)]
+    return [cached_route(grid, stops[i], stops[i + 1], algo_type)
+            for i in range(len(stops) - 1)]
+
+def stitch_legs(legs):
+    route = []
+    for leg in legs:
+        if not leg:
+            return []
+        route.extend(leg if not route else leg[1:])
+    return route
+
+
+# --- COMMAND LINE ---
+def parse_stop(text):
+    row, col = text.replace(" ", "").split(",")
+    return int(row), int(col)
+
+def read_stops(path):
+    with open(path) as f:
+        return [parse_stop(line) for line in f if line.strip()]
+
+def format_path(path):
+    return " ".join(f"{row},{col}" for row, col in path)
+
+def run_visual(grid, stops):
+    # pygame (and its display init) is only pulled in here
+    import importlib.util
+    import os
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), SIMULATION_SCRIPT)
+    spec = importlib.util.spec_from_file_location("rescue_simulation", script)
+    simulation = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(simulation)
+
+    win = simulation.init_display(simulation.WIDTH)
+    simulation.main(win, simulation.WIDTH, cells=grid, stops=stops)
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Rescue 1122 headless route planner")
+    parser.add_argument("map", help="binary map, or text map with one row per line ('#' = barrier)")
+    parser.add_argument("stops", nargs="*", help="stops as row,col in visiting order")
+    parser.add_argument("--stops-file", help="file with one row,col stop per line")
+    parser.add_argument("--optimize", action="store_true",
+                        help="reorder the stops for the shortest route (first and last stay fixed)")
+    parser.add_argument("--free-end", action="store_true",
+                        help="with --optimize, let any stop be visited last")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for the --optimize distance matrix")
+    parser.add_argument("--hierarchical", action="store_true",
+                        help="plan legs with HPA* (faster on big maps, near-optimal)")
+    parser.add_argument("--alt", action="store_true",
+                        help="use the landmark heuristic (tables cached in <map>.alt.npz)")
+    parser.add_argument("--components", action="store_true",
+                        help="build the connected-component index first, so walled-off stops "
+                             "are rejected without a search")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="anytime search: best route per leg found within this many ms")
+    parser.add_argument("--nearest", action="store_true",
+                        help="the last stop is an incident: pick the nearest of the other stops (units)")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="record the searches to a trace file for trace_replay.py")
+    parser.add_argument("--json", action="store_true", help="print routes as JSON")
+    parser.add_argument("--export-binary", metavar="PATH",
+                        help="write the map in the binary format and exit")
+    parser.add_argument("--visual", action="store_true", help="open the pygame simulation")
+    args = parser.parse_args(argv)
+
+    grid = load_map(args.map)
+    if args.export_binary:
+        grid.save_binary(args.export_binary)
+        print(f"Saved {grid.rows}x{grid.cols} map to '{args.export_binary}'")
+        return 0
+
+    stops = [parse_stop(s) for s in args.stops]
+    if args.stops_file:
+        stops += read_stops(args.stops_file)
+    if len(stops) < 2:
+        parser.error("need at least two stops")
+    if args.trace and (args.hierarchical or args.budget_ms is not None or args.nearest):
+        parser.error("--trace records plain A*/ALT legs only")
+    for row, col in stops:
+        if not (0 <= row < grid.rows and 0 <= col < grid.cols):
+            parser.error(f"stop {row},{col} is outside the {grid.rows}x{grid.cols} map")
+    if args.components:
+        from connectivity import components_for
+        components_for(grid)
+
+    if args.nearest:
+        units, incident = stops[:-1], stops[-1]
+        unit, path = nearest_unit(grid, units, incident)
+        if args.json:
+            print(json.dumps({"incident": incident, "unit": unit if path else None,
+                              "found": bool(path), "length": max(len(path) - 1, 0), "path": path}))
+        elif path:
+            (r1, c1), (r2, c2) = units[unit], incident
+            print(f"unit {unit + 1} at {r1},{c1} -> {r2},{c2} length {len(path) - 1}")
+            print(f"  {format_path(path)}")
+        else:
+            print("no unit can reach the incident")
+        return 0 if path else 1
+
+    if args.optimize:
+        from multi_stop import plan_multi_stop
+        order, _, _ = plan_multi_stop(grid, stops, fix_end=not args.free_end,
+                                      processes=args.workers)
+        stops = [stops[i] for i in order]
+
+    if args.visual:
+        run_visual(grid, stops)
+        return 0
+
+    algo_type = "A_Star"
+    if args.alt:
+        use_landmarks(grid, args.map)
+        algo_type = "ALT"
+    bounds = timed_out = None
+    if args.budget_ms is not None:
+        legs, bounds, timed_out = zip(*(anytime_route(grid, stops[i], stops[i + 1], args.budget_ms)
+                                        for i in range(len(stops) - 1)))
+    elif args.trace:
+        # searched leg by leg, past the route cache, so each search is recorded
+        from search_trace import SearchTrace
+        trace = SearchTrace(grid)
+        legs = []
+        for i in range(len(stops) - 1):
+            leg = A_star_algorithm(grid, stops[i], stops[i + 1], algo_type=algo_type, probe=trace)
+            trace.add_path(leg)
+            legs.append(leg)
+        trace.save(args.trace)
+    else:
+        legs = plan_route(grid, stops, args.hierarchical, algo_type)
+
+    if args.json:
+        print(json.dumps({
+            "stops": stops,
+            "legs": [dict({"from": stops[i], "to": stops[i + 1], "found": bool(leg),
+                           "length": max(len(leg) - 1, 0), "path": leg},
+                          **({} if bounds is None else {"bound": bounds[i],
+                                                        "timed_out": timed_out[i]}))
+                     for i, leg in enumerate(legs)],
+        }))
+    else:
+        for i, leg in enumerate(legs):
+            (r1, c1), (r2, c2) = stops[i], stops[i + 1]
+            if leg:
+                bound = "" if bounds is None else f" (within x{bounds[i]:.2f} of optimal)"
+                print(f"leg {i + 1}: {r1},{c1} -> {r2},{c2} length {len(leg) - 1}{bound}")
+                print(f"  {format_path(leg)}")
+            elif timed_out is not None and timed_out[i]:
+                print(f"leg {i + 1}: {r1},{c1} -> {r2},{c2} no route within {args.budget_ms:g} ms")
+            else:
+                print(f"leg {i + 1}: {r1},{c1} -> {r2},{c2} unreachable")
+        route = stitch_legs(legs)
+        if route:
+            print(f"total length {len(route) - 1}")
+
+    return 0 if all(legs) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from route_planner import anytime_route, cached_route, load_map, nearest_unit
+
+# Local route-planning service: newline-delimited JSON over a localhost TCP
+# socket, so several dispatch consoles can share one planner. Searches run in
+# a process pool; each worker memory-maps (or reads) the map once. Every
+# request has a deadline, and the number of requests in flight is capped:
+# past the cap, new requests are answered "busy" straight away instead of
+# queueing without bound. Throughput / latency counters are available
+# through the "stats" op. The map is read-only while the service runs.
+#
+# Requests, one JSON object per line ("id" is echoed back):
+#   {"id": 1, "op": "route", "start": [0, 0], "goal": [40, 12]}
+#   {"id": 2, "op": "multi_stop", "stops": [[0, 0], [9, 3], [20, 7]], "fix_end": false}
+#   {"id": 3, "op": "stats"}
+#   {"id": 4, "op": "route", "start": [0, 0], "goal": [40, 12], "budget_ms": 5}
+#   {"id": 5, "op": "nearest", "units": [[0, 0], [30, 2], [8, 40]], "incident": [40, 12]}
+# Optional "deadline_ms" overrides the server default for that request. A route
+# request with "budget_ms" gets the best route the anytime search (ARA*) finds
+# in that time instead of the optimal one, plus its "bound": the route costs
+# at most bound x optimal, and "timed_out", which is true when the budget ran
+# out before any route was found (a goal that can't be reached gives false).
+# "nearest" answers with the position in "units" of the unit that reaches the
+# incident first, and its route.
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_PENDING = 64
+DEFAULT_DEADLINE_MS = 2000
+LATENCY_WINDOW = 1000
+
+
+# --- WORKERS ---
+_worker_grid = None
+
+def _init_worker(map_path):
+    global _worker_grid
+    _worker_grid = load_map(map_path)
+
+def _path_cost(grid, path):
+    return sum(grid.cost(grid.index(*p)) for p in path[1:])
+
+def _route_job(start, goal, budget_ms, deadline):
+    # deadline is time.monotonic(), which every process on the machine shares;
+    # a job that waited in the pool past it is dropped without searching
+    if time.monotonic() > deadline:
+        return None
+    grid = _worker_grid
+    if budget_ms is not None:
+        # never search past the request's own deadline
+        budget_ms = min(budget_ms, (deadline - time.monotonic()) * 1000)
+        path, bound, timed_out = anytime_route(grid, start, goal, budget_ms)
+        return {"found": bool(path), "length": _path_cost(grid, path), "path": path,
+                "bound": bound, "timed_out": timed_out}
+    path = cached_route(grid, start, goal)
+    return {"found": bool(path), "length": _path_cost(grid, path), "path": path}
+
+def _nearest_job(units, incident, deadline):
+    if time.monotonic() > deadline:
+        return None
+    grid = _worker_grid
+    unit, path = nearest_unit(grid, units, incident)
+    return {"found": bool(path), "unit": unit if path else None,
+            "length": _path_cost(grid, path), "path": path}
+
+def _multi_stop_job(stops, fix_end, deadline):
+    from multi_stop import UNREACHABLE, plan_multi_stop
+
+    if time.monotonic() > deadline:
+        return None
+    order, route, length = plan_multi_stop(_worker_grid, stops, fix_end=fix_end, processes=1)
+    found = length != UNREACHABLE
+    return {"found": found, "order": order, "length": length if found else None,
+            "path": route}
+
+
+# --- SERVICE ---
+class RouteService:
+    def __init__(self, map_path, workers=None, max_pending=DEFAULT_MAX_PENDING,
+                 deadline_ms=DEFAULT_DEADLINE_MS):
+        self.map_path = map_path
+        self.grid = load_map(map_path)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.deadline_ms = deadline_ms
+        self.pool = None
+        self.server = None
+
+        self.pending = 0
+        self.started = time.monotonic()
+        self.counters = {"requests": 0, "completed": 0, "busy": 0, "timeouts": 0, "errors": 0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        # spawned rather than forked: a forked worker would inherit the open
+        # client sockets and keep them alive after the service closes them
+        self.pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                        initargs=(self.map_path,),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    # --- CONNECTIONS ---
+    async def handle(self, reader, writer):
+        # Requests on one connection run concurrently; replies carry the
+        # request id and may come back out of order. A connection with
+        # max_pending requests in flight isn't read from until one finishes,
+        # so a single pipelining client is slowed down by TCP rather than
+        # answered "busy".
+        tasks = set()
+        slots = asyncio.Semaphore(self.max_pending)
+        try:
+            while True:
+                await slots.acquire()
+                line = await reader.readline()
+                if not line or not line.strip():
+                    slots.release()
+                    if not line:
+                        break
+                    continue
+                task = asyncio.create_task(self.respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: slots.release())
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, line, writer):
+        t0 = time.monotonic()
+        reply = await self.dispatch(line)
+        if reply.get("ok"):
+            self.latencies.append((time.monotonic() - t0) * 1000)
+        writer.write(json.dumps(reply).encode() + b"\n")
+        try:
+            # waits while the client isn't reading its replies
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def dispatch(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            self.counters["errors"] += 1
+            return {"ok": False, "error": "bad json"}
+        if not isinstance(request, dict):
+            self.counters["errors"] += 1
+            return {"ok": False, "error": "request must be a JSON object"}
+
+        reply = {"id": request.get("id")}
+        op = request.get("op")
+        if op == "stats":
+            reply.update(ok=True, stats=self.stats())
+            return reply
+
+        self.counters["requests"] += 1
+        if self.pending >= self.max_pending:
+            self.counters["busy"] += 1
+            reply.update(ok=False, error="busy")
+            return reply
+
+        try:
+            job = self.make_job(op, request)
+            timeout = float(request.get("deadline_ms", self.deadline_ms)) / 1000
+        except (KeyError, TypeError, ValueError) as e:
+            self.counters["errors"] += 1
+            reply.update(ok=False, error=str(e))
+            return reply
+
+        deadline = time.monotonic() + timeout
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(self.pool, *job, deadline), timeout)
+        except asyncio.TimeoutError:
+            result = None
+        except Exception as e:
+            self.counters["errors"] += 1
+            reply.update(ok=False, error=f"{type(e).__name__}: {e}")
+            return reply
+        finally:
+            self.pending -= 1
+
+        if result is None:
+            self.counters["timeouts"] += 1
+            reply.update(ok=False, error="deadline exceeded")
+            return reply
+        self.counters["completed"] += 1
+        reply.update(ok=True, **result)
+        return reply
+
+    def make_job(self, op, request):
+        if op == "route":
+            budget = request.get("budget_ms")
+            return (_route_job, self.cell(request["start"]), self.cell(request["goal"]),
+                    None if budget is None else float(budget))
+        if op == "nearest":
+            units = [self.cell(u) for u in request["units"]]
+            if not units:
+                raise ValueError("need at least one unit")
+            return (_nearest_job, units, self.cell(request["incident"]))
+        if op == "multi_stop":
+            stops = [self.cell(s) for s in request["stops"]]
+            if len(stops) < 2:
+                raise ValueError("need at least two stops")
+            return (_multi_stop_job, stops, bool(request.get("fix_end", True)))
+        raise ValueError(f"unknown op {op!r}")
+
+    def cell(self, value):
+        row, col = (int(v) for v in value)
+        if not (0 <= row < self.grid.rows and 0 <= col < self.grid.cols):
+            raise ValueError(f"{row},{col} is outside the {self.grid.rows}x{self.grid.cols} map")
+        return row, col
+
+    # --- COUNTERS ---
+    def stats(self):
+        uptime = time.monotonic() - self.started
+        ordered = sorted(self.latencies)
+
+        def pct(p):
+            return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)] if ordered else 0.0
+
+        stats = dict(self.counters)
+        stats.update(pending=self.pending, uptime_s=round(uptime, 3),
+                     throughput_rps=round(self.counters["completed"] / uptime, 3) if uptime else 0.0,
+                     latency_ms={"p50": round(pct(50), 3), "p95": round(pct(95), 3),
+                                 "max": round(ordered[-1], 3) if ordered else 0.0,
+                                 "window": len(ordered)})
+        return stats
+
+
+# --- COMMAND LINE ---
+async def serve(args):
+    service = RouteService(args.map, args.workers, args.max_pending, args.deadline_ms)
+    server = await service.start(args.host, args.port)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"Serving '{args.map}' ({service.grid.rows}x{service.grid.cols}) on {host}:{port} "
+          f"with {service.workers} workers")
+    try:
+        await server.serve_forever()
+    finally:
+        await service.close()
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rescue 1122 route-planning service (JSON lines)")
+    parser.add_argument("map", help="binary or text map")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default localhost only)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="search processes (default: cores)")
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                        help="requests in flight before new ones are answered 'busy'")
+    parser.add_argument("--deadline-ms", type=int, default=DEFAULT_DEADLINE_MS,
+                        help="default per-request deadline")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import numpy as np
+
+from connectivity import label_components
+from grid_engine import ArrayGrid
+
+# --- SCENARIO GENERATORS ---
+# Seeded benchmark maps in families that stress the searches differently
+# from uniform noise (which flatters A*: the straight line is almost always
+# nearly open):
+#   open     - open field, 4% scattered barriers
+#   uniform  - the classic 15% noise of benchmark.create_grid
+#   city     - building blocks between one-cell side streets and three-cell
+#              arterial roads, with side streets closed here and there
+#   rooms    - rooms joined by one-cell corridors, a random spanning tree of
+#              them plus a few extra links
+#   maze     - perfect maze (random spanning tree, Kruskal style), one route
+#              between any two cells
+#   pockets  - light noise plus large cup-shaped obstacles open towards the
+#              top-left, so a search heading for the bottom-right walks into
+#              dead-end pockets
+#
+# Maps are made in bulk: generate() returns a (count, size, size) uint8
+# barrier array, every map of the batch built by the same array operations
+# (rectangles are painted with 2-D difference arrays, spanning trees come
+# from one scipy minimum_spanning_tree call over the whole batch). A batch
+# is reproducible from (family, size, count, seed).
+
+ROOM_PITCH = 12
+CUP_SPACING = 25  # cups per map: size // CUP_SPACING
+
+
+def paint_rects(shape, sample, r0, c0, r1, c1):
+    # bool (count, rows, cols) union of the rectangles [r0, r1) x [c0, c1)
+    # of each sample; empty rectangles are ignored
+    count, rows, cols = shape
+    r0, r1 = np.clip(r0, 0, rows), np.clip(r1, 0, rows)
+    c0, c1 = np.clip(c0, 0, cols), np.clip(c1, 0, cols)
+    keep = (r1 > r0) & (c1 > c0)
+    sample, r0, c0, r1, c1 = (a[keep] for a in np.broadcast_arrays(sample, r0, c0, r1, c1))
+    diff = np.zeros((count, rows + 1, cols + 1), dtype=np.int32)
+    np.add.at(diff, (sample, r0, c0), 1)
+    np.add.at(diff, (sample, r0, c1), -1)
+    np.add.at(diff, (sample, r1, c0), -1)
+    np.add.at(diff, (sample, r1, c1), 1)
+    return diff.cumsum(axis=1).cumsum(axis=2)[:, :rows, :cols] > 0
+
+def spanning_tree(rng, count, k):
+    # random spanning tree of each sample's k x k lattice: bool arrays of the
+    # kept (count, k - 1, k) down links and (count, k, k - 1) right links
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import minimum_spanning_tree
+
+    ids = np.arange(count * k * k).reshape(count, k, k)
+    tails = np.concatenate((ids[:, :-1].ravel(), ids[:, :, :-1].ravel()))
+    heads = np.concatenate((ids[:, 1:].ravel(), ids[:, :, 1:].ravel()))
+    # weights in [1, 2) so no edge has weight 0 (which sparse drops)
+    weights = 1 + rng.random(len(tails))
+    tree = minimum_spanning_tree(coo_matrix((weights, (tails, heads)), shape=(ids.size, ids.size)))
+    tree = tree.tocoo()
+    low, high = np.minimum(tree.row, tree.col), np.maximum(tree.row, tree.col)
+
+    down = np.zeros((count, k - 1, k), dtype=bool)
+    right = np.zeros((count, k, k - 1), dtype=bool)
+    vertical = high - low == k
+    s, cell = np.divmod(low, k * k)
+    i, j = np.divmod(cell, k)
+    down[s[vertical], i[vertical], j[vertical]] = True
+    right[s[~vertical], i[~vertical], j[~vertical]] = True
+    return down, right
+
+
+# --- FAMILIES ---
+def open_field(rng, count, size):
+    return (rng.random((count, size, size)) < 0.04).astype(np.uint8)
+
+def uniform(rng, count, size):
+    return (rng.random((count, size, size)) < 0.15).astype(np.uint8)
+
+def street_lines(rng, count, size):
+    # (street, arterial) bool (count, size) masks of the rows (or columns)
+    # streets run along: blocks of 6-12 cells, every fourth street arterial
+    n = size // 7 + 2
+    arterial = (np.arange(n) + rng.integers(0, 4, (count, 1))) % 4 == 0
+    width = np.where(arterial, 3, 1)
+    end = np.cumsum(rng.integers(6, 13, (count, n)) + width, axis=1) - rng.integers(0, 6, (count, 1))
+    start = end - width
+    sample = np.repeat(np.arange(count), n)
+    lines = []
+    for chosen in (np.ones_like(arterial), arterial):
+        diff = np.zeros((count, size + 1), dtype=np.int32)
+        np.add.at(diff, (sample, np.clip(start, 0, size).ravel()), chosen.ravel())
+        np.add.at(diff, (sample, np.clip(end, 0, size).ravel()), -chosen.ravel().astype(np.int32))
+        lines.append(diff.cumsum(axis=1)[:, :size] > 0)
+    return lines
+
+def city(rng, count, size):
+    row_street, row_arterial = street_lines(rng, count, size)
+    col_street, col_arterial = street_lines(rng, count, size)
+    street = row_street[:, :, None] | col_street[:, None, :]
+    arterial = row_arterial[:, :, None] | col_arterial[:, None, :]
+    # closures on side streets (never on an arterial or its crossings)
+    closed = street & ~arterial & (rng.random((count, size, size)) < 0.08)
+    return (~street | closed).astype(np.uint8)
+
+def rooms(rng, count, size):
+    pitch = ROOM_PITCH
+    k = max(size // pitch, 2)
+    centre = pitch // 2
+    slot_r, slot_c = np.meshgrid(np.arange(k) * pitch, np.arange(k) * pitch, indexing='ij')
+    sample = np.arange(count)[:, None, None]
+
+    # each room covers its slot's centre, 1 to centre - 2 cells in from each side
+    inset = rng.integers(1, centre - 1, (4, count, k, k))
+    free = paint_rects((count, size, size), sample, slot_r + inset[0], slot_c + inset[1],
+                       slot_r + pitch - inset[2], slot_c + pitch - inset[3])
+
+    down, right = spanning_tree(rng, count, k)
+    down |= rng.random(down.shape) < 0.1
+    right |= rng.random(right.shape) < 0.1
+    # corridors between the centres of linked rooms
+    s, i, j = np.nonzero(down)
+    top, left = i * pitch + centre, j * pitch + centre
+    free |= paint_rects(free.shape, s, top, left, top + pitch + 1, left + 1)
+    s, i, j = np.nonzero(right)
+    top, left = i * pitch + centre, j * pitch + centre
+    free |= paint_rects(free.shape, s, top, left, top + 1, left + pitch + 1)
+    return (~free).astype(np.uint8)
+
+def maze(rng, count, size):
+    # maze cells sit on odd coordinates; an even size leaves a wall border
+    k = (size - 1) // 2
+    cells = np.ones((count, size, size), dtype=np.uint8)
+    cells[:, 1:2 * k:2, 1:2 * k:2] = 0
+    down, right = spanning_tree(rng, count, k)
+    cells[:, 2:2 * k - 1:2, 1:2 * k:2][down] = 0
+    cells[:, 1:2 * k:2, 2:2 * k - 1:2][right] = 0
+    return cells
+
+def pockets(rng, count, size):
+    cells = rng.random((count, size, size)) < 0.03
+    cups = max(size // CUP_SPACING, 2)
+    shape = (count, cups)
+    span = rng.integers(size // 8, size // 3 + 1, (2,) + shape)
+    r0 = rng.integers(0, size - span[0] + 1, shape)
+    c0 = rng.integers(0, size - span[1] + 1, shape)
+    r1, c1 = r0 + span[0], c0 + span[1]
+    wall = 2
+    # every cup has a bottom and a right wall; it is open either to the
+    # left (top wall) or to the top (left wall)
+    open_left = rng.random(shape) < 0.5
+    sample = np.broadcast_to(np.arange(count)[:, None], shape)
+    cells |= paint_rects(cells.shape, sample, r1 - wall, c0, r1, c1)
+    cells |= paint_rects(cells.shape, sample, r0, c1 - wall, r1, c1)
+    cells |= paint_rects(cells.shape, sample, r0, c0, np.where(open_left, r0 + wall, r0), c1)
+    cells |= paint_rects(cells.shape, sample, r0, c0, r1, np.where(open_left, c0, c0 + wall))
+    return cells.astype(np.uint8)
+
+
+FAMILIES = {
+    'open': open_field,
+    'uniform': uniform,
+    'city': city,
+    'rooms': rooms,
+    'maze': maze,
+    'pockets': pockets,
+}
+
+
+def generate(family, size, count=1, seed=0):
+    # (count, size, size) uint8 barrier maps (1 = barrier)
+    if family not in FAMILIES:
+        raise ValueError(f"unknown scenario family {family!r}, expected one of {list(FAMILIES)}")
+    rng = np.random.default_rng([seed, size, list(FAMILIES).index(family)])
+    return FAMILIES[family](rng, count, size)
+
+def scenario_grids(family, size, count=1, seed=0):
+    return [ArrayGrid(size, size, cells.ravel().copy()) for cells in generate(family, size, count, seed)]
+
+def endpoints(grid):
+    # (start, end) cell ids for a corner-to-corner query: the free cells of
+    # the largest connected region nearest the top-left and bottom-right
+    # corners, or None when the map has no free cell
+    labels = label_components(grid)
+    free = np.flatnonzero(labels >= 0)
+    if not len(free):
+        return None
+    values, sizes = np.unique(labels[free], return_counts=True)
+    region = free[labels[free] == values[np.argmax(sizes)]]
+    rows, cols = np.divmod(region, grid.cols)
+    start = region[np.argmin(rows + cols)]
+    end = region[np.argmax(rows + cols)]
+    return int(start), int(end)
@@ -0,0 +1,891 @@
+import heapq
+import time
+import weakref
+from collections import deque
+
+import numpy as np
+
+from landmarks import UNREACHED, Landmarks
+
+# ARA*: starting heuristic weight and how much it drops per round
+ANYTIME_WEIGHT = 2.5
+ANYTIME_STEP = 0.5
+
+
+# --- SEARCH CORE ---
+# One SearchCore per ArrayGrid. The score and parent arrays are allocated once
+# and reused by every query: a cell's entries only count as set when its stamp
+# matches the current generation, so starting a new query is O(1) instead of
+# refilling the whole grid with infinity. They are int32 numpy arrays behind
+# memoryviews (plain-int indexing, like ArrayGrid.flat); only the stamps start
+# zeroed, so the OS maps in pages as searches touch them and memory follows
+# the cells a query visits rather than the size of the map.
+def cell_arrays(size):
+    # (g_score, came_from, stamp) for one search direction
+    return (memoryview(np.empty(size, dtype=np.int32)),
+            memoryview(np.empty(size, dtype=np.int32)),
+            memoryview(np.zeros(size, dtype=np.int32)))
+
+class SearchCore:
+    def __init__(self, grid):
+        self.grid = grid
+        self.size = grid.size
+        self.g_score, self.came_from, self.stamp = cell_arrays(grid.size)
+        self.generation = 0
+        self.start = -1
+        self._jump_tables = None
+        self._jump_version = -1
+        # ALT tables for algo_type "ALT"; built on first use, or assign a
+        # set loaded from disk (landmarks.Landmarks.load)
+        self.landmarks = None
+        # backward-search arrays, only allocated for bidirectional queries
+        self.g_back = None
+        self.came_back = None
+        self.stamp_back = None
+        self.last_visits = (0, 0)
+        # whether the last anytime_search stopped on its time/expansion budget
+        self.last_out_of_budget = False
+
+    def new_query(self, start):
+        self.generation += 1
+        self.start = start
+        self.g_score[start] = 0
+        self.came_from[start] = -1
+        self.stamp[start] = self.generation
+
+    def cost(self, idx):
+        if self.stamp[idx] != self.generation:
+            return float("inf")
+        return self.g_score[idx]
+
+    def path(self, goal):
+        # start -> goal as flat ids, empty if goal was never reached
+        if self.stamp[goal] != self.generation:
+            return []
+        path = [goal]
+        came_from = self.came_from
+        cols = self.grid.cols
+        while came_from[path[-1]] != -1:
+            current = path[-1]
+            parent = came_from[current]
+            # jump point search links cells along a straight line; fill in
+            # the cells it skipped
+            if abs(parent - current) >= cols:
+                step = cols if parent > current else -cols
+            else:
+                step = 1 if parent > current else -1
+            path.extend(range(current + step, parent + step, step))
+        path.reverse()
+        return path
+
+    def search(self, start, goal, algo_type="A_Star", on_open=None, on_close=None, probe=None):
+        # probe: an optional instrumentation.SearchProbe
+        if algo_type.startswith("Dial_"):
+            return self.bucket_search(start, goal, algo_type[5:], on_open, on_close, probe)
+        if algo_type in ("JPS", "Bi_A_Star", "Bi_Dijkstra") and self.grid.cost_flat is not None:
+            raise ValueError(f"{algo_type} needs unit move costs; use A_Star or Dial_A_Star")
+        if algo_type == "ARA_Star":
+            # run the anytime search to the end; the last route is optimal
+            solutions, nodes_visited = self.anytime_search(start, goal, probe=probe, on_open=on_open,
+                                                           on_close=on_close)
+            if not solutions:
+                return False, nodes_visited, 0
+            return True, nodes_visited, solutions[-1][1]
+        if algo_type == "JPS":
+            return self.jump_point_search(start, goal, on_open, on_close, probe)
+        if algo_type == "Bi_A_Star":
+            return self.bidirectional_search(start, goal, True, on_open, on_close, probe)
+        if algo_type == "Bi_Dijkstra":
+            return self.bidirectional_search(start, goal, False, on_open, on_close, probe)
+        return self._heap_search((start,), goal, algo_type, on_open, on_close, probe)
+
+    def _heap_search(self, starts, goal, algo_type, on_open=None, on_close=None, probe=None):
+        # the heap engine behind search(); every cell in starts begins at
+        # g = 0 with no parent
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        flat = grid.flat
+        cost_flat = grid.cost_flat
+        g_score = self.g_score
+        came_from = self.came_from
+        stamp = self.stamp
+
+        self.new_query(starts[0])
+        gen = self.generation
+        for start in starts[1:]:
+            stamp[start] = gen
+            g_score[start] = 0
+            came_from[start] = -1
+
+        goal_row, goal_col = divmod(goal, cols)
+        use_g = algo_type != "Greedy"
+        use_h = algo_type != "Dijkstra"
+        alt = None
+        if algo_type == "ALT":
+            # A* with the landmark bound (never below Manhattan distance)
+            alt = self.landmark_tables()
+            alt.target(goal)
+
+        count = 0
+        # entries are (f, -g, -count, cell): ties on f go to the larger g,
+        # then to the latest push, the same order as bucket_search's stacks.
+        # An entry whose g is worse than the cell's current g is stale and
+        # gets skipped when popped
+        open_heap = []
+        for start in dict.fromkeys(starts):
+            row, col = divmod(start, cols)
+            h = abs(row - goal_row) + abs(col - goal_col) if use_h else 0
+            if alt is not None:
+                h = alt.bound(start)
+            count -= 1
+            open_heap.append((h, 0, count, start))
+        heapq.heapify(open_heap)
+        push = heapq.heappush
+        pop = heapq.heappop
+        nodes_visited = 0
+        if probe is not None:
+            on_open = probe.opener(on_open)
+            probe.phase("search")
+
+        while open_heap:
+            _, g, _, current = pop(open_heap)
+            g = -g
+            if g > g_score[current]:
+                if probe is not None:
+                    probe.stale_pops += 1
+                continue
+            nodes_visited += 1
+            if probe is not None:
+                probe.expanded(current, len(open_heap))
+
+            if current == goal:
+                return True, nodes_visited, g
+
+            row, col = divmod(current, cols)
+            temp_g_score = g + 1
+
+            for neighbor, ok in (
+                (current + cols, row < rows - 1),
+                (current - cols, row > 0),
+                (current + 1, col < cols - 1),
+                (current - 1, col > 0),
+            ):
+                if not ok or flat[neighbor]:
+                    continue
+                if cost_flat is not None:
+                    temp_g_score = g + cost_flat[neighbor]
+                if stamp[neighbor] == gen and temp_g_score >= g_score[neighbor]:
+                    continue
+
+                stamp[neighbor] = gen
+                g_score[neighbor] = temp_g_score
+                came_from[neighbor] = current
+
+                f = temp_g_score if use_g else 0
+                if alt is not None:
+                    f += alt.bound(neighbor)
+                elif use_h:
+                    n_row, n_col = divmod(neighbor, cols)
+                    f += abs(n_row - goal_row) + abs(n_col - goal_col)
+
+                count -= 1
+                push(open_heap, (f, -temp_g_score, count, neighbor))
+                if on_open is not None:
+                    on_open(neighbor)
+
+            if on_close is not None:
+                on_close(current)
+
+        return False, nodes_visited, 0
+
+    def multi_source_search(self, sources, goal, algo_type="A_Star", on_open=None, on_close=None,
+                            probe=None):
+        # One search from all sources at once, each seeded at g = 0: the
+        # first to reach goal is the nearest, for the price of one search.
+        # Returns (found, nodes_visited, cost, source); path() gives the
+        # winner's route.
+        if algo_type not in ("A_Star", "Dijkstra", "ALT"):
+            raise ValueError(f"{algo_type} can't pick the nearest source; use A_Star, Dijkstra or ALT")
+        flat = self.grid.flat
+        sources = [s for s in sources if not flat[s]]
+        if not sources:
+            return False, 0, 0, -1
+        found, nodes_visited, cost = self._heap_search(sources, goal, algo_type, on_open, on_close,
+                                                       probe)
+        if not found:
+            return False, nodes_visited, 0, -1
+        source = goal
+        while self.came_from[source] != -1:
+            source = self.came_from[source]
+        return True, nodes_visited, cost, source
+
+    def nearest_sources(self, sources):
+        # One-to-all from several sources: every cell gets the distance to
+        # it from the nearest source and that source's position in sources
+        # (ties go to the earlier one). Returns numpy (dist, owner); cells no
+        # source reaches keep UNREACHED and -1. BFS on unit-cost grids,
+        # Dijkstra when the grid has costs.
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        flat = grid.flat
+        cost_flat = grid.cost_flat
+        dist = np.full(grid.size, UNREACHED, dtype=np.uint32)
+        owner = np.full(grid.size, -1, dtype=np.int32)
+        d_view = memoryview(dist)
+        o_view = memoryview(owner)
+
+        seeds = []
+        for i, source in enumerate(sources):
+            if not flat[source] and o_view[source] < 0:
+                d_view[source] = 0
+                o_view[source] = i
+                seeds.append(source)
+
+        if cost_flat is None:
+            queue = deque(seeds)
+            while queue:
+                current = queue.popleft()
+                d = d_view[current] + 1
+                o = o_view[current]
+                row, col = divmod(current, cols)
+                for neighbor, ok in (
+                    (current + cols, row < rows - 1),
+                    (current - cols, row > 0),
+                    (current + 1, col < cols - 1),
+                    (current - 1, col > 0),
+                ):
+                    if ok and not flat[neighbor] and o_view[neighbor] < 0:
+                        d_view[neighbor] = d
+                        o_view[neighbor] = o
+                        queue.append(neighbor)
+            return dist, owner
+
+        # (g, source position, cell): equal distances go to the earlier source
+        heap = [(0, o_view[s], s) for s in seeds]
+        while heap:
+            g, o, current = heapq.heappop(heap)
+            if g > d_view[current] or o != o_view[current]:
+                continue
+            row, col = divmod(current, cols)
+            for neighbor, ok in (
+                (current + cols, row < rows - 1),
+                (current - cols, row > 0),
+                (current + 1, col < cols - 1),
+                (current - 1, col > 0),
+            ):
+                if not ok or flat[neighbor]:
+                    continue
+                d = g + cost_flat[neighbor]
+                if d < d_view[neighbor] or (d == d_view[neighbor] and o < o_view[neighbor]):
+                    d_view[neighbor] = d
+                    o_view[neighbor] = o
+                    heapq.heappush(heap, (d, o, neighbor))
+        return dist, owner
+
+    def landmark_tables(self):
+        if self.landmarks is None or self.landmarks.is_stale():
+            self.landmarks = Landmarks.build(self.grid)
+        return self.landmarks
+
+    def search_many(self, start, targets):
+        # One-to-many Dijkstra: runs until every reachable target is settled
+        # and returns {target: cost}; paths are then available via path().
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        flat = grid.flat
+        cost_flat = grid.cost_flat
+        g_score = self.g_score
+        came_from = self.came_from
+        stamp = self.stamp
+
+        self.new_query(start)
+        gen = self.generation
+
+        remaining = set(targets)
+        costs = {}
+        open_heap = [(0, start)]
+        push = heapq.heappush
+        pop = heapq.heappop
+
+        while open_heap and remaining:
+            g, current = pop(open_heap)
+            if g > g_score[current]:
+                continue
+            if current in remaining:
+                remaining.discard(current)
+                costs[current] = g
+
+            row, col = divmod(current, cols)
+            temp_g_score = g + 1
+
+            for neighbor, ok in (
+                (current + cols, row < rows - 1),
+                (current - cols, row > 0),
+                (current + 1, col < cols - 1),
+                (current - 1, col > 0),
+            ):
+                if not ok or flat[neighbor]:
+                    continue
+                if cost_flat is not None:
+                    temp_g_score = g + cost_flat[neighbor]
+                if stamp[neighbor] == gen and temp_g_score >= g_score[neighbor]:
+                    continue
+
+                stamp[neighbor] = gen
+                g_score[neighbor] = temp_g_score
+                came_from[neighbor] = current
+                push(open_heap, (temp_g_score, neighbor))
+
+        return costs
+
+    # --- ANYTIME SEARCH (ARA*) ---
+    # Weighted A* with f = g + w*h finds a route quickly that costs at most w
+    # times the optimum. The weight is then lowered step by step, and each
+    # round carries on from the previous one: g, parents and the open list are
+    # kept, and cells whose g improved after they were expanded (the
+    # "inconsistent" ones) are simply reopened. The bound reported with each
+    # route is min(w, cost / lowest g + h still open), which is often well
+    # under w. Runs until w reaches 1 (that route is optimal) or the budget
+    # is spent.
+    def anytime_search(self, start, goal, time_budget_ms=None, max_expansions=None,
+                       weight=ANYTIME_WEIGHT, step=ANYTIME_STEP, on_solution=None, probe=None,
+                       on_open=None, on_close=None):
+        # returns (solutions, nodes_visited); solutions are (path, cost, bound)
+        # tuples in the order found, cost and bound never increasing.
+        # on_solution(path, cost, bound, nodes_visited) is called as each
+        # one is found and can return True to stop there. on_open also sees
+        # closed cells that get reopened for the next round.
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        flat = grid.flat
+        cost_flat = grid.cost_flat
+        g_score = self.g_score
+        came_from = self.came_from
+        stamp = self.stamp
+
+        self.new_query(start)
+        gen = self.generation
+        deadline = None
+        if time_budget_ms is not None:
+            deadline = time.perf_counter() + time_budget_ms / 1000
+
+        goal_row, goal_col = divmod(goal, cols)
+
+        def h(idx):
+            row, col = divmod(idx, cols)
+            return abs(row - goal_row) + abs(col - goal_col)
+
+        w = max(weight, 1.0)
+        count = 0
+        open_heap = [(w * h(start), count, 0, start)]
+        push = heapq.heappush
+        pop = heapq.heappop
+        closed = set()
+        incons = set()
+        solutions = []
+        nodes_visited = 0
+        out_of_budget = False
+        if probe is not None:
+            on_open = probe.opener(on_open)
+            probe.phase("search")
+
+        while True:
+            while open_heap:
+                key, _, g, current = open_heap[0]
+                if g > g_score[current] or current in closed:
+                    pop(open_heap)
+                    if probe is not None:
+                        probe.stale_pops += 1
+                    continue
+                if stamp[goal] == gen and g_score[goal] <= key:
+                    break
+                if max_expansions is not None and nodes_visited >= max_expansions:
+                    out_of_budget = True
+                    break
+                if deadline is not None and not nodes_visited & 255 and time.perf_counter() > deadline:
+                    out_of_budget = True
+                    break
+                pop(open_heap)
+                closed.add(current)
+                nodes_visited += 1
+                if probe is not None:
+                    probe.expanded(current, len(open_heap))
+
+                row, col = divmod(current, cols)
+                temp_g_score = g + 1
+                for neighbor, ok in (
+                    (current + cols, row < rows - 1),
+                    (current - cols, row > 0),
+                    (current + 1, col < cols - 1),
+                    (current - 1, col > 0),
+                ):
+                    if not ok or flat[neighbor]:
+                        continue
+                    if cost_flat is not None:
+                        temp_g_score = g + cost_flat[neighbor]
+                    if stamp[neighbor] == gen and temp_g_score >= g_score[neighbor]:
+                        continue
+                    stamp[neighbor] = gen
+                    g_score[neighbor] = temp_g_score
+                    came_from[neighbor] = current
+                    if neighbor in closed:
+                        incons.add(neighbor)
+                    else:
+                        count += 1
+                        push(open_heap, (temp_g_score + w * h(neighbor), count,
+                                         temp_g_score, neighbor))
+                    if on_open is not None:
+                        on_open(neighbor)
+
+                if on_close is not None:
+                    on_close(current)
+
+            if out_of_budget or stamp[goal] != gen:
+                break
+
+            # open cells (the live heap entries) plus the reopened ones
+            frontier = {cell for _, _, g, cell in open_heap
+                        if g == g_score[cell] and cell not in closed}
+            frontier |= incons
+            best = g_score[goal]
+            lower = min((g_score[cell] + h(cell) for cell in frontier), default=best)
+            bound = min(w, best / lower) if lower else 1.0
+            path = self.path(goal)
+            # the parent chain can only be cheaper than g(goal)
+            cost = len(path) - 1 if cost_flat is None else sum(cost_flat[idx] for idx in path[1:])
+            bound = max(bound, 1.0)
+            solutions.append((path, cost, bound))
+            if on_solution is not None and on_solution(path, cost, bound, nodes_visited):
+                break
+            if w <= 1.0 or lower >= best:
+                break
+
+            w = max(1.0, w - step)
+            open_heap = []
+            for cell in frontier:
+                count += 1
+                open_heap.append((g_score[cell] + w * h(cell), count, g_score[cell], cell))
+            heapq.heapify(open_heap)
+            closed = set()
+            incons = set()
+
+        self.last_out_of_budget = out_of_budget
+        return solutions, nodes_visited
+
+    # --- BUCKET QUEUE (DIAL) ---
+    # Move costs are small integers, so f values are too: the open list is a
+    # dict of f -> {g: stack of cells} scanned upwards from the current f
+    # instead of a binary heap. Within an f bucket the largest g is popped
+    # first, which on open ground runs straight at the goal instead of
+    # flooding every cell with the same f; the heap search breaks ties the
+    # same way, so both expand the same cells. algo_type is "A_Star",
+    # "Dijkstra" or "Greedy" as for search().
+    def bucket_search(self, start, goal, algo_type="A_Star", on_open=None, on_close=None, probe=None):
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        flat = grid.flat
+        cost_flat = grid.cost_flat
+        g_score = self.g_score
+        came_from = self.came_from
+        stamp = self.stamp
+
+        self.new_query(start)
+        gen = self.generation
+
+        goal_row, goal_col = divmod(goal, cols)
+        use_g = algo_type != "Greedy"
+        use_h = algo_type != "Dijkstra"
+
+        row, col = divmod(start, cols)
+        f_cur = abs(row - goal_row) + abs(col - goal_col) if use_h else 0
+        buckets = {f_cur: {0: [start]}}
+        # highest g pushed to each bucket; pops scan down from it, so an
+        # emptied g stack costs a step per g level rather than a max() over
+        # the bucket
+        tops = {f_cur: 0}
+        pending = 1
+        nodes_visited = 0
+        if probe is not None:
+            on_open = probe.opener(on_open)
+            probe.phase("search")
+
+        while pending:
+            bucket = buckets.get(f_cur)
+            if not bucket:
+                buckets.pop(f_cur, None)
+                tops.pop(f_cur, None)
+                f_cur += 1
+                continue
+            g = tops[f_cur]
+            stack = bucket.get(g)
+            while stack is None:
+                g -= 1
+                stack = bucket.get(g)
+            tops[f_cur] = g
+            current = stack.pop()
+            pending -= 1
+            if not stack:
+                del bucket[g]
+            if g > g_score[current]:
+                if probe is not None:
+                    probe.stale_pops += 1
+                continue
+            nodes_visited += 1
+            if probe is not None:
+                probe.expanded(current, pending)
+
+            if current == goal:
+                return True, nodes_visited, g
+
+            row, col = divmod(current, cols)
+            temp_g_score = g + 1
+
+            for neighbor, ok in (
+                (current + cols, row < rows - 1),
+                (current - cols, row > 0),
+                (current + 1, col < cols - 1),
+                (current - 1, col > 0),
+            ):
+                if not ok or flat[neighbor]:
+                    continue
+                if cost_flat is not None:
+                    temp_g_score = g + cost_flat[neighbor]
+                if stamp[neighbor] == gen and temp_g_score >= g_score[neighbor]:
+                    continue
+
+                stamp[neighbor] = gen
+                g_score[neighbor] = temp_g_score
+                came_from[neighbor] = current
+
+                f = temp_g_score if use_g else 0
+                if use_h:
+                    n_row, n_col = divmod(neighbor, cols)
+                    f += abs(n_row - goal_row) + abs(n_col - goal_col)
+
+                if f < f_cur:
+                    # only Greedy can step below the current bucket
+                    f_cur = f
+                bucket = buckets.get(f)
+                if bucket is None:
+                    buckets[f] = {temp_g_score: [neighbor]}
+                    tops[f] = temp_g_score
+                else:
+                    stack = bucket.get(temp_g_score)
+                    if stack is None:
+                        bucket[temp_g_score] = [neighbor]
+                        if temp_g_score > tops[f]:
+                            tops[f] = temp_g_score
+                    else:
+                        stack.append(neighbor)
+                pending += 1
+                if on_open is not None:
+                    on_open(neighbor)
+
+            if on_close is not None:
+                on_close(current)
+
+        return False, nodes_visited, 0
+
+    # --- BIDIRECTIONAL SEARCH ---
+    # Forward from start and backward from goal, always growing the smaller
+    # frontier. A* uses the average potential p(v) = (h_goal(v) - h_start(v)) / 2
+    # (negated backwards), which keeps reduced costs consistent for both
+    # sides; keys are doubled so they stay integers. With mu the best
+    # start-goal length seen through a meeting cell, the search can stop as
+    # soon as top_forward + top_backward >= 2 * mu and mu is optimal. Key ties
+    # go to the larger g, as in _heap_search. The average potential is only
+    # half as strong as Manhattan distance, so Bi_A_Star does not beat A* on
+    # open grids (up to about twice the expansions); Bi_Dijkstra saves about
+    # a third over Dijkstra on central queries and little corner to corner,
+    # where the two searches together still cover the map.
+    def bidirectional_search(self, start, goal, use_heuristic=True, on_open=None, on_close=None,
+                             probe=None):
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        flat = grid.flat
+        if self.g_back is None:
+            self.g_back, self.came_back, self.stamp_back = cell_arrays(grid.size)
+
+        self.new_query(start)
+        gen = self.generation
+        g_back, came_back, stamp_back = self.g_back, self.came_back, self.stamp_back
+        g_back[goal] = 0
+        came_back[goal] = -1
+        stamp_back[goal] = gen
+
+        s_row, s_col = divmod(start, cols)
+        t_row, t_col = divmod(goal, cols)
+
+        def potential(idx):
+            # doubled forward potential h_goal - h_start; backward uses -potential
+            if not use_heuristic:
+                return 0
+            row, col = divmod(idx, cols)
+            return (abs(row - t_row) + abs(col - t_col)) - (abs(row - s_row) + abs(col - s_col))
+
+        sides = (
+            [[(potential(start), 0, 0, start)], self.g_score, self.came_from, self.stamp, 1],
+            [[(-potential(goal), 0, 0, goal)], g_back, came_back, stamp_back, -1],
+        )
+        visits = [0, 0]
+        best = float("inf")
+        meet = -1
+        count = 0
+        push = heapq.heappush
+        pop = heapq.heappop
+
+        if probe is not None:
+            on_open = probe.opener(on_open)
+            probe.phase("search")
+        if start == goal:
+            self.last_visits = (1, 0)
+            return True, 1, 0
+
+        while sides[0][0] and sides[1][0]:
+            if sides[0][0][0][0] + sides[1][0][0][0] >= 2 * best:
+                break
+
+            side = 0 if len(sides[0][0]) <= len(sides[1][0]) else 1
+            heap, g_score, came_from, stamp, sign = sides[side]
+            other = sides[1 - side]
+            g_other, stamp_other = other[1], other[3]
+
+            _, g, _, current = pop(heap)
+            g = -g
+            if g > g_score[current]:
+                if probe is not None:
+                    probe.stale_pops += 1
+                continue
+            visits[side] += 1
+            if probe is not None:
+                probe.expanded(current, len(heap) + len(other[0]), side)
+
+            row, col = divmod(current, cols)
+            temp_g_score = g + 1
+
+            for neighbor, ok in (
+                (current + cols, row < rows - 1),
+                (current - cols, row > 0),
+                (current + 1, col < cols - 1),
+                (current - 1, col > 0),
+            ):
+                if not ok or flat[neighbor]:
+                    continue
+                if stamp[neighbor] == gen and temp_g_score >= g_score[neighbor]:
+                    continue
+
+                stamp[neighbor] = gen
+                g_score[neighbor] = temp_g_score
+                came_from[neighbor] = current
+
+                if stamp_other[neighbor] == gen and temp_g_score + g_other[neighbor] < best:
+                    best = temp_g_score + g_other[neighbor]
+                    meet = neighbor
+
+                count -= 1
+                push(heap, (2 * temp_g_score + sign * potential(neighbor), -temp_g_score,
+                            count, neighbor))
+                if on_open is not None:
+                    on_open(neighbor)
+
+            if on_close is not None:
+                on_close(current)
+
+        self.last_visits = tuple(visits)
+        if meet == -1:
+            return False, visits[0] + visits[1], 0
+
+        # splice the backward half onto the forward parents so path() works
+        g_score, came_from, stamp = self.g_score, self.came_from, self.stamp
+        current = meet
+        while current != goal:
+            nxt = came_back[current]
+            came_from[nxt] = current
+            g_score[nxt] = g_score[current] + 1
+            stamp[nxt] = gen
+            current = nxt
+        return True, visits[0] + visits[1], best
+
+    # --- JUMP POINT SEARCH ---
+    # 4-connected JPS for unit-cost grids. Vertical moves come first in the
+    # canonical ordering: a horizontal run only stops where a wall ends
+    # beside it (a forced neighbour) or at the goal, while a vertical run also
+    # stops wherever a horizontal probe from it would find such a point. Only
+    # these jump points go on the heap, and A* over them stays optimal.
+    # Every jump is a single lookup in the tables from build_jump_tables.
+    def jump_tables(self):
+        if self._jump_tables is None or self._jump_version != self.grid.version:
+            self._jump_tables = build_jump_tables(self.grid)
+            self._jump_version = self.grid.version
+        return self._jump_tables
+
+    def jump_point_search(self, start, goal, on_open=None, on_close=None, probe=None):
+        grid = self.grid
+        rows, cols = grid.rows, grid.cols
+        g_score = self.g_score
+        came_from = self.came_from
+        stamp = self.stamp
+        right, left, down, up, h_run = self.jump_tables()
+
+        self.new_query(start)
+        gen = self.generation
+        goal_row, goal_col = divmod(goal, cols)
+
+        row, col = divmod(start, cols)
+        count = 0
+        # (f, -g, -count, cell): same tie-break as _heap_search
+        open_heap = [(abs(row - goal_row) + abs(col - goal_col), 0, count, start)]
+        push = heapq.heappush
+        pop = heapq.heappop
+        nodes_visited = 0
+        if probe is not None:
+            on_open = probe.opener(on_open)
+            probe.phase("search")
+
+        while open_heap:
+            _, g, _, current = pop(open_heap)
+            g = -g
+            if g > g_score[current]:
+                if probe is not None:
+                    probe.stale_pops += 1
+                continue
+            nodes_visited += 1
+            if probe is not None:
+                probe.expanded(current, len(open_heap))
+
+            if current == goal:
+                return True, nodes_visited, g
+
+            row, col = divmod(current, cols)
+            parent = came_from[current]
+            if parent == -1:
+                directions = ((0, 1), (0, -1), (1, 0), (-1, 0))
+            elif abs(current - parent) < cols:
+                dc = 1 if current > parent else -1
+                directions = ((0, dc), (1, 0), (-1, 0))
+            else:
+                dr = 1 if current > parent else -1
+                directions = ((dr, 0), (0, 1), (0, -1))
+
+            for dr, dc in directions:
+                if dc:
+                    nc = col + dc
+                    if not 0 <= nc < cols:
+                        continue
+                    stop = (right if dc > 0 else left)[current + dc]
+                    last = stop if stop >= 0 else -stop - 2 - dc
+                    if row == goal_row and (nc <= goal_col <= last if dc > 0
+                                            else last <= goal_col <= nc):
+                        jump = goal
+                    elif stop >= 0:
+                        jump = row * cols + stop
+                    else:
+                        continue
+                else:
+                    nr = row + dr
+                    if not 0 <= nr < rows:
+                        continue
+                    stop = (down if dr > 0 else up)[current + dr * cols]
+                    last = stop if stop >= 0 else -stop - 2 - dr
+                    if (nr <= goal_row <= last if dr > 0 else last <= goal_row <= nr) and (
+                            goal_col == col or h_run[goal] == h_run[goal_row * cols + col]):
+                        # the goal is on this run, or a probe from its row reaches it
+                        jump = goal_row * cols + col
+                    elif stop >= 0:
+                        jump = stop * cols + col
+                    else:
+                        continue
+
+                j_row, j_col = divmod(jump, cols)
+                temp_g_score = g + abs(j_row - row) + abs(j_col - col)
+                if stamp[jump] == gen and temp_g_score >= g_score[jump]:
+                    continue
+
+                stamp[jump] = gen
+                g_score[jump] = temp_g_score
+                came_from[jump] = current
+                f = temp_g_score + abs(j_row - goal_row) + abs(j_col - goal_col)
+                count -= 1
+                push(open_heap, (f, -temp_g_score, count, jump))
+                if on_open is not None:
+                    on_open(jump)
+
+            if on_close is not None:
+                on_close(current)
+
+        return False, nodes_visited, 0
+
+
+# --- JUMP TABLES ---
+# For every cell and direction, where a jump entering that cell stops: the
+# row/col of the jump point (>= 0), or -(wall + 2) for the first wall or
+# border when the run has none. h_run labels each horizontal run of free
+# cells (by the column of the wall to its left) so the goal-row probe of a
+# vertical jump is a single comparison. Built once per grid version.
+def _next_event(event, axis):
+    n = event.shape[axis]
+    idx = np.arange(n).reshape((-1, 1) if axis == 0 else (1, -1))
+    pos = np.where(event, idx, n)
+    flip = (slice(None, None, -1), slice(None)) if axis == 0 else (slice(None), slice(None, None, -1))
+    return np.minimum.accumulate(pos[flip], axis=axis)[flip]
+
+def _prev_event(event, axis):
+    idx = np.arange(event.shape[axis]).reshape((-1, 1) if axis == 0 else (1, -1))
+    return np.maximum.accumulate(np.where(event, idx, -1), axis=axis)
+
+def _encode(found, forced, axis):
+    # found holds row/col indices; mark which ones are forced points
+    other = np.indices(found.shape)[1 - axis]
+    inside = (found >= 0) & (found < found.shape[axis])
+    clipped = np.clip(found, 0, found.shape[axis] - 1)
+    at = forced[clipped, other] if axis == 0 else forced[other, clipped]
+    return np.where(inside & at, found, -(found + 2)).astype(np.int32)
+
+def build_jump_tables(grid):
+    free = grid.as_2d() == 0
+    wall = ~free
+
+    def shifted(dr, dc):
+        # out[r, c] = free[r + dr, c + dc], False off the grid
+        out = np.zeros_like(free)
+        rows, cols = free.shape
+        out[max(-dr, 0):rows - max(dr, 0), max(-dc, 0):cols - max(dc, 0)] = \
+            free[max(dr, 0):rows + min(dr, 0), max(dc, 0):cols + min(dc, 0)]
+        return out
+
+    up, down, lft, rgt = shifted(-1, 0), shifted(1, 0), shifted(0, -1), shifted(0, 1)
+    ul, ur, dl, dr = shifted(-1, -1), shifted(-1, 1), shifted(1, -1), shifted(1, 1)
+
+    forced_right = free & ((up & ~ul) | (down & ~dl))
+    forced_right[:, 0] = False
+    forced_left = free & ((up & ~ur) | (down & ~dr))
+    forced_left[:, -1] = False
+
+    right = _encode(_next_event(forced_right | wall, 1), forced_right, 1)
+    left = _encode(_prev_event(forced_left | wall, 1), forced_left, 1)
+
+    probe = np.zeros_like(free)
+    probe[:, :-1] |= right[:, 1:] >= 0
+    probe[:, 1:] |= left[:, :-1] >= 0
+
+    stop_down = free & (((lft & ~ul) | (rgt & ~ur)) | probe)
+    stop_down[0, :] &= probe[0, :]
+    stop_up = free & (((lft & ~dl) | (rgt & ~dr)) | probe)
+    stop_up[-1, :] &= probe[-1, :]
+
+    down_t = _encode(_next_event(stop_down | wall, 0), stop_down, 0)
+    up_t = _encode(_prev_event(stop_up | wall, 0), stop_up, 0)
+    h_run = _prev_event(wall, 1).astype(np.int32)
+
+    return tuple(memoryview(t.ravel()) for t in (right, left, down_t, up_t, h_run))
+
+
+_cores = weakref.WeakKeyDictionary()
+
+def core_for(grid):
+    # cores are cached per grid so repeated queries reuse the same arrays
+    core = _cores.get(grid)
+    if core is None or core.size != grid.size:
+        core = SearchCore(grid)
+        _cores[grid] = core
+    return core
@@ -0,0 +1,81 @@
+import struct
+from array import array
+
+import numpy as np
+
+from instrumentation import SearchProbe
+
+# --- SEARCH TRACES ---
+# A SearchTrace is a SearchProbe that also records every push (open), every
+# expansion (close) and the final path as one uint32 per event, so a search
+# can be recorded at full speed and watched afterwards with trace_replay.py
+# instead of drawing while it runs. Pass it as the probe of any search; legs
+# recorded with the same trace are appended one after another:
+#
+#   trace = SearchTrace(grid)
+#   path = A_star_algorithm(grid, start, end, probe=trace)
+#   trace.add_path(path)
+#   trace.save("query.rtrace")
+#
+# Trace files have a 32-byte header (TRACE_MAGIC, format version, rows, cols,
+# event count), the map's barriers packed one bit per cell in row order, then
+# the events as little-endian uint32: cell id << 2 | event kind.
+TRACE_MAGIC = b"R1122TRC"
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct("<8sIIIQ4x")
+EV_OPEN, EV_CLOSE, EV_PATH = range(3)
+
+
+class SearchTrace(SearchProbe):
+    def __init__(self, grid, on_expand=None, on_push=None):
+        super().__init__(on_expand, on_push)
+        if grid.size >= 1 << 30:
+            raise ValueError("map too large for a trace (2**30 cells at most)")
+        self.rows = grid.rows
+        self.cols = grid.cols
+        self.walls = grid.as_2d() != 0
+        # not cleared by begin(), so several searches share one trace
+        self.events = array('I')
+
+    def expanded(self, cell, open_size, side=0):
+        self.events.append(cell << 2 | EV_CLOSE)
+        super().expanded(cell, open_size, side)
+
+    def opener(self, on_open=None):
+        pushed = super().opener(on_open)
+        record = self.events.append
+
+        def traced(cell):
+            record(cell << 2)
+            pushed(cell)
+        return traced
+
+    def add_path(self, path):
+        # path as (row, col) pairs, as the planners return it
+        cols = self.cols
+        self.events.extend((row * cols + col) << 2 | EV_PATH for row, col in path)
+
+    def save(self, path):
+        events = np.frombuffer(self.events, dtype=np.uint32).astype('<u4', copy=False)
+        with open(path, 'wb') as f:
+            f.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, self.rows, self.cols, len(events)))
+            f.write(np.packbits(self.walls, axis=None).tobytes())
+            f.write(events.tobytes())
+
+
+def load_trace(path):
+    # (walls, cells, kinds): walls a (rows, cols) bool array, cells the flat
+    # cell id and kinds the EV_* kind of each event, in order
+    with open(path, 'rb') as f:
+        head = f.read(TRACE_HEADER.size)
+        if len(head) < TRACE_HEADER.size or not head.startswith(TRACE_MAGIC):
+            raise ValueError(f"{path} is not a search trace")
+        _, version, rows, cols, count = TRACE_HEADER.unpack(head)
+        if version != TRACE_VERSION:
+            raise ValueError(f"{path}: unsupported trace format version {version}")
+        packed = np.fromfile(f, dtype=np.uint8, count=(rows * cols + 7) // 8)
+        events = np.fromfile(f, dtype='<u4', count=count)
+    if len(events) < count:
+        raise ValueError(f"{path} is truncated: expected {count} events")
+    walls = np.unpackbits(packed, count=rows * cols).astype(bool).reshape(rows, cols)
+    return walls, (events >> 2).astype(np.intp), (events & 3).astype(np.uint8)
@@ -0,0 +1,136 @@
+import os
+import sys
+
+import numpy as np
+import pygame
+
+from grid_view import CLOSED, EMPTY, OPEN, PATH, WALL, Viewport, handle_view_event
+from search_trace import EV_PATH, load_trace
+
+# --- TRACE REPLAY ---
+# Plays back a search trace (search_trace.py) in a pygame window, at any
+# speed and in either direction, independently of the search that wrote it.
+# Pushed cells turn green, expanded cells red and the route yellow; routes
+# stay on top of the searches after them.
+#
+#   python trace_replay.py query.rtrace [--speed EVENTS_PER_S]
+#
+# [space] pause / play, [+] / [-] double / halve the speed, [,] / [.] step
+# back / forward, [0]-[9] jump to that tenth of the trace, [Home] / [End],
+# and click or drag on the bar at the bottom to seek. Zoom and pan as in the
+# large-grid simulation.
+WIDTH = 600
+BAR_HEIGHT = 10
+DEFAULT_DURATION_S = 10
+# event kind -> cell state
+KIND_STATE = np.array([OPEN, CLOSED, PATH], dtype=np.uint8)
+
+
+class Replay:
+    def __init__(self, walls, cells, kinds):
+        self.base = np.where(walls, WALL, EMPTY).astype(np.uint8)
+        self.state = self.base.copy()
+        self.flat = self.state.reshape(-1)
+        self.cells = cells
+        self.states = KIND_STATE[kinds]
+        self.path_events = np.flatnonzero(kinds == EV_PATH)
+        self.pos = 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def seek(self, pos):
+        # state after the first pos events; going back replays from the start
+        pos = min(max(int(pos), 0), len(self))
+        if pos < self.pos:
+            self.state[...] = self.base
+            self.pos = 0
+        self.flat[self.cells[self.pos:pos]] = self.states[self.pos:pos]
+        self.pos = pos
+        shown = self.path_events[:np.searchsorted(self.path_events, pos)]
+        self.flat[self.cells[shown]] = PATH
+
+
+def draw_bar(win, fraction):
+    w, h = win.get_size()
+    pygame.draw.rect(win, (40, 40, 40), (0, h - BAR_HEIGHT, w, BAR_HEIGHT))
+    pygame.draw.rect(win, (255, 165, 0), (0, h - BAR_HEIGHT, round(w * fraction), BAR_HEIGHT))
+
+
+def replay(path, speed=None, width=WIDTH):
+    walls, cells, kinds = load_trace(path)
+    player = Replay(walls, cells, kinds)
+    total = len(player)
+    speed = speed or max(total / DEFAULT_DURATION_S, 1.0)
+
+    pygame.init()
+    win = pygame.display.set_mode((width, width))
+    view = Viewport(win, *walls.shape)
+    clock = pygame.time.Clock()
+    name = os.path.basename(path)
+
+    cursor = 0.0
+    playing = True
+    run = True
+    while run:
+        dt = clock.tick(60) / 1000
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                run = False
+            elif handle_view_event(view, event):
+                pass
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    playing = not playing
+                    if cursor >= total:
+                        cursor = 0.0
+                elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    speed *= 2
+                elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    speed = max(speed / 2, 1.0)
+                elif event.key in (pygame.K_COMMA, pygame.K_PERIOD):
+                    # one frame's worth of events at the current speed
+                    step = max(speed / 60, 1.0)
+                    cursor += step if event.key == pygame.K_PERIOD else -step
+                    playing = False
+                elif event.key == pygame.K_HOME:
+                    cursor = 0.0
+                elif event.key == pygame.K_END:
+                    cursor = total
+                elif pygame.K_0 <= event.key <= pygame.K_9:
+                    cursor = total * (event.key - pygame.K_0) / 10
+
+        # click or drag on the progress bar
+        x, y = pygame.mouse.get_pos()
+        if pygame.mouse.get_pressed()[0] and y >= win.get_height() - BAR_HEIGHT:
+            cursor = total * x / max(win.get_width() - 1, 1)
+        elif playing:
+            cursor += speed * dt
+        cursor = min(max(cursor, 0.0), total)
+        if cursor >= total:
+            playing = False
+
+        player.seek(cursor)
+        view.draw(player.state, flip=False)
+        draw_bar(win, player.pos / total if total else 1.0)
+        pygame.display.flip()
+        pygame.display.set_caption(f"Replay {name}: {player.pos}/{total} events, "
+                                   f"{speed:.0f}/s{'' if playing else ' (paused)'}")
+
+    pygame.quit()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a recorded search trace")
+    parser.add_argument("trace", help="trace file written by SearchTrace.save (route_planner.py --trace)")
+    parser.add_argument("--speed", type=float, default=None,
+                        help=f"events per second (default: the whole trace in {DEFAULT_DURATION_S} s)")
+    parser.add_argument("--width", type=int, default=WIDTH)
+    args = parser.parse_args(argv)
+    replay(args.trace, args.speed, args.width)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())